@@ -1,15 +1,47 @@
 """Bilibili 音频下载器 - 主入口"""
 
+import argparse
 import sys
 import os
-from PyQt6.QtWidgets import QApplication
-from src.ui import MainWindow
-from src.utils import setup_logger
+from src.utils import setup_logger, DownloadCache
+from src.utils.library_scan import probe_missing_durations, scan_library
 from src.config import settings
 
 
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="Bilibili 音频下载器")
+    parser.add_argument(
+        '--remap-root',
+        nargs=2,
+        action='append',
+        metavar=('OLD', 'NEW'),
+        help="迁移音乐库：把下载缓存中的旧根目录改写为新根目录后退出（可重复指定）",
+    )
+    parser.add_argument(
+        '--scan-library',
+        nargs='*',
+        metavar='ROOT',
+        help="扫描音乐库，按音频文件中的 BV 号标签重建下载缓存后退出（不指定目录时扫描 library_roots）",
+    )
+    parser.add_argument(
+        '--probe-durations',
+        action='store_true',
+        help="从本地音频文件读取下载缓存中缺少的时长后退出",
+    )
+    parser.add_argument(
+        '--scan-workers',
+        type=int,
+        default=None,
+        help="扫描音乐库使用的进程数 / 读取时长使用的线程数",
+    )
+    return parser.parse_args()
+
+
 def main():
     """主函数"""
+    args = parse_args()
+
     # 获取 main.py 所在目录，并构造 config.ini 的绝对路径
     script_dir = os.path.dirname(os.path.abspath(__file__))
     config_path = os.path.join(script_dir, 'config.ini')
@@ -23,7 +55,23 @@ def main():
         level=settings.log_level,
         console=True
     )
-    
+
+    if args.remap_root:
+        DownloadCache().remap_roots(dict(args.remap_root))
+        return
+
+    if args.scan_library is not None:
+        scan_library(args.scan_library or settings.library_roots, workers=args.scan_workers)
+        return
+
+    if args.probe_durations:
+        probe_missing_durations(workers=args.scan_workers)
+        return
+
+    # 命令行维护操作无需图形界面，界面模块在这里才导入
+    from PyQt6.QtWidgets import QApplication
+    from src.ui import MainWindow
+
     # 创建应用
     app = QApplication(sys.argv)
     window = MainWindow()
@@ -61,6 +61,27 @@ class DownloadConfig:
     PAGE_LOAD_TIMEOUT = 10
     PAGE_CHANGE_TIMEOUT = 15
     NETWORK_TIMEOUT = 30
+    STALL_TIMEOUT = 10  # 音频流读取超时（秒），同时是卡顿检测的时间窗口
+    STALL_MIN_BYTES = 64 * 1024  # 每个时间窗口内至少收到的字节数，否则切换到下一个镜像节点
+    PLAYURL_TTL = 100 * 60  # 音频链接不带 deadline 参数时假定的有效期（秒）
+    PLAYURL_REFRESH_MARGIN = 60  # 距离过期不足该秒数时重新获取音频链接
+
+    # 下载流水线：解析（视频信息 + 音频链接）与打标签（封面 + 写入标签）的线程数，
+    # 下载阶段的线程数由 download_workers 配置；阶段间队列长度为下游线程数的倍数
+    RESOLVE_WORKERS = 4
+    TAG_WORKERS = 2
+    PIPELINE_QUEUE_FACTOR = 2
+    ASYNC_MAX_CONCURRENCY = 128  # 异步客户端同时在途的最大请求数
+    FAVORITE_SYNC_WORKERS = 4  # 同步整个账号时同时获取列表的收藏夹数
+    INCREMENTAL_KNOWN_RUN = 20  # 增量同步时连续遇到多少个已记录的视频即停止翻页
+
+    # 各接口族的限速参数: (初始速率, 最低速率, 最高速率)，单位为请求/秒
+    RATE_LIMITS = {
+        "favorite": (4.0, 0.5, 10.0),
+        "video": (4.0, 0.5, 20.0),
+        "playurl": (4.0, 0.5, 20.0),
+        "stream": (8.0, 1.0, 50.0),
+    }
     
     REQUEST_HEADERS = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
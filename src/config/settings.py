@@ -2,7 +2,7 @@
 
 import os
 import configparser
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings:
@@ -14,11 +14,25 @@ class Settings:
         self._ts_playlist_path: str = ''
         self._default_download_path: str = os.path.join(home, 'Music', 'BilibiliDownloader')
         self._chromedriver_path: Optional[str] = None # 建议留空，使用自动管理
+        self._library_roots: List[str] = []
         self._log_file: str = 'bilibili_downloader.log'
         self._log_level: str = 'INFO'
         self._max_retries: int = 3
         self._page_load_timeout: int = 10
         self._network_timeout: int = 30
+        self._download_workers: int = 4
+        self._incremental_sync: bool = True
+        self._segment_threshold_mb: float = 32
+        self._segment_connections: int = 4
+        self._content_store: bool = False
+        self._store_path: str = ''
+        self._video_info_ttl_hours: float = 168
+        self._negative_ttl_hours: float = 24
+        self._max_audio_kbps: int = 0
+        self._min_audio_kbps: int = 0
+        self._preferred_audio_ids: List[int] = []
+        self._include_lossless: bool = False
+        self._playlist_order: str = 'favorite'
         self._default_url: str = ''
         self._flag_replace_invalid_filename_chars: bool = True
 
@@ -40,6 +54,14 @@ class Settings:
     def default_download_path(self, value: str):
         self._default_download_path = value
     
+    @property
+    def library_roots(self) -> List[str]:
+        """音乐库根目录：下载缓存中的路径相对这些目录保存，未配置时使用默认下载路径"""
+        roots = list(self._library_roots) or [self._default_download_path]
+        if self._store_path and self._store_path not in roots:
+            roots.append(self._store_path)
+        return roots
+
     @property
     def chromedriver_path(self) -> str:
         """ChromeDriver 路径"""
@@ -74,6 +96,71 @@ class Settings:
         """网络请求超时"""
         return self._network_timeout
 
+    @property
+    def download_workers(self) -> int:
+        """并发下载的最大线程数"""
+        return self._download_workers
+
+    @property
+    def segment_threshold_mb(self) -> float:
+        """音频流超过该大小（MB）时分段多连接下载，0 表示禁用"""
+        return self._segment_threshold_mb
+
+    @property
+    def segment_connections(self) -> int:
+        """分段下载时每个文件使用的连接数"""
+        return self._segment_connections
+
+    @property
+    def content_store(self) -> bool:
+        """是否将音频按 BV 号/cid 只保存一份，收藏夹目录中放置链接"""
+        return self._content_store
+
+    @property
+    def store_path(self) -> str:
+        """内容存储目录，为空则使用保存路径上一级目录下的 .store"""
+        return self._store_path
+
+    @property
+    def incremental_sync(self) -> bool:
+        """重新同步收藏夹时是否只获取新增部分"""
+        return self._incremental_sync
+
+    @property
+    def video_info_ttl_hours(self) -> float:
+        """视频元数据缓存有效期（小时）"""
+        return self._video_info_ttl_hours
+
+    @property
+    def negative_ttl_hours(self) -> float:
+        """失效视频负缓存有效期（小时）"""
+        return self._negative_ttl_hours
+
+    @property
+    def max_audio_kbps(self) -> int:
+        """音频流码率上限（kbps），0 表示不限制"""
+        return self._max_audio_kbps
+
+    @property
+    def min_audio_kbps(self) -> int:
+        """大于 0 时选择不低于该码率的最小音频流"""
+        return self._min_audio_kbps
+
+    @property
+    def preferred_audio_ids(self) -> List[int]:
+        """按优先顺序排列的音质 ID"""
+        return self._preferred_audio_ids
+
+    @property
+    def include_lossless(self) -> bool:
+        """是否下载杜比与 Hi-Res 无损音频"""
+        return self._include_lossless
+
+    @property
+    def playlist_order(self) -> str:
+        """播放列表排序方式：favorite（与收藏夹顺序一致）或 append（新曲目追加到末尾）"""
+        return self._playlist_order
+
     @property
     def default_url(self) -> Optional[str]:
         """默认URL"""
@@ -99,6 +186,8 @@ class Settings:
             self._ts_playlist_path = paths.get('ts_playlist_path', self._ts_playlist_path)
             self._default_download_path = paths.get('default_download_path', self._default_download_path)
             self._chromedriver_path = paths.get('chromedriver_path') or self._chromedriver_path
+            library_roots = paths.get('library_roots', '')
+            self._library_roots = [root.strip() for root in library_roots.split(';') if root.strip()]
 
         if 'Logging' in config:
             logging_config = config['Logging']
@@ -110,6 +199,35 @@ class Settings:
             self._max_retries = download_config.getint('max_retries', self._max_retries)
             self._page_load_timeout = download_config.getint('page_load_timeout', self._page_load_timeout)
             self._network_timeout = download_config.getint('network_timeout', self._network_timeout)
+            self._download_workers = max(1, download_config.getint('download_workers', self._download_workers))
+            self._incremental_sync = download_config.getboolean('incremental_sync', self._incremental_sync)
+            self._segment_threshold_mb = download_config.getfloat('segment_threshold_mb', self._segment_threshold_mb)
+            self._segment_connections = max(1, download_config.getint('segment_connections', self._segment_connections))
+            self._content_store = download_config.getboolean('content_store', self._content_store)
+            self._store_path = download_config.get('store_path', self._store_path)
+
+        if 'Cache' in config:
+            cache_config = config['Cache']
+            self._video_info_ttl_hours = cache_config.getfloat('video_info_ttl_hours', self._video_info_ttl_hours)
+            self._negative_ttl_hours = cache_config.getfloat('negative_ttl_hours', self._negative_ttl_hours)
+
+        if 'Audio' in config:
+            audio_config = config['Audio']
+            self._max_audio_kbps = audio_config.getint('max_audio_kbps', self._max_audio_kbps)
+            self._min_audio_kbps = audio_config.getint('min_audio_kbps', self._min_audio_kbps)
+            preferred_ids = audio_config.get('preferred_audio_ids', '')
+            self._preferred_audio_ids = [
+                int(audio_id) for audio_id in preferred_ids.replace(',', ' ').split() if audio_id.isdigit()
+            ]
+            self._include_lossless = audio_config.getboolean('include_lossless', self._include_lossless)
+
+        if 'Playlist' in config:
+            playlist_config = config['Playlist']
+            order = playlist_config.get('order', self._playlist_order).strip().lower()
+            if order in ('favorite', 'append'):
+                self._playlist_order = order
+            else:
+                print(f"警告: 未知的播放列表排序方式 {order}，将使用 {self._playlist_order}。")
 
         if 'General' in config:
             general_config = config['General']
@@ -5,11 +5,13 @@ from .api_client import FavoriteAPIClient
 from .parser import PageParser
 from .navigator import PageNavigator
 from .audio import AudioDownloader
+from .scheduler import DownloadScheduler
 
 __all__ = [
     'BilibiliDownloader',
     'FavoriteAPIClient',
     'PageParser',
     'PageNavigator',
-    'AudioDownloader'
+    'AudioDownloader',
+    'DownloadScheduler'
 ]
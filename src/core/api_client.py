@@ -1,15 +1,20 @@
 """Bilibili API 客户端"""
 
+import itertools
 import requests
 import re
-import time
 import logging
 import math
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 
 from ..config import BilibiliAPI, DownloadConfig
 from ..utils import get_logger
+from ..utils.metadata_cache import VideoInfoCache, get_video_info_cache
+from . import rate_limiter
+from .http import get_api_data
+from .quality import AudioQualityPolicy
+from .retry import APIError
 
 logger = get_logger(__name__)
 
@@ -40,6 +45,8 @@ class FavoriteAPIClient:
             "title": media.get("title"),
             "artist": (media.get("upper") or {}).get("name"),
             "cover_url": media.get("cover"),
+            "cid": (media.get("ugc") or {}).get("first_cid"),
+            "duration": media.get("duration") or 0,
             "invalid": bool(media.get("attr")),
         }
     
@@ -56,63 +63,128 @@ class FavoriteAPIClient:
         url = f"{BilibiliAPI.FAVORITE_LIST}?up_mid={user_id}"
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data['code'] == 0:
-                favorites = data['data']['list']
-                logger.info(f"成功获取 {len(favorites)} 个收藏夹")
-                return favorites
-            else:
-                logger.error(f"获取收藏夹列表失败: {data.get('message', '未知错误')}")
-                return []
-                
+            data = get_api_data(url, rate_limiter.FAVORITE, self.headers)
+            favorites = (data or {}).get('list') or []
+            logger.info(f"成功获取 {len(favorites)} 个收藏夹")
+            return favorites
+        except APIError as e:
+            logger.error(f"获取收藏夹列表失败: {e}")
+            return []
         except requests.RequestException as e:
             logger.error(f"请求收藏夹列表时发生异常: {e}")
             return []
-    
-    def get_favorite_videos(
+
+    def _fetch_favorite_page(self, media_id: str, page: int, page_size: int) -> Dict[str, Any]:
+        """
+        请求收藏夹的一页（带限速与重试），按收藏时间倒序，最新收藏的视频在前
+
+        Raises:
+            APIError / requests.RequestException: 重试耗尽后仍失败
+        """
+        url = f"{BilibiliAPI.FAVORITE_INFO}?media_id={media_id}&pn={page}&ps={page_size}&order=mtime"
+        return get_api_data(url, rate_limiter.FAVORITE, self.headers) or {}
+
+    def _extract_page_videos(self, page_data: Dict[str, Any], page: int) -> List[Dict[str, Any]]:
+        """提取一页中的视频信息"""
+        page_videos: List[Dict[str, Any]] = []
+        for media in page_data.get("medias", []) or []:
+            video_info = self._extract_video_info(media)
+            if video_info:
+                page_videos.append(video_info)
+                logger.debug(f"[第 {page} 页] 找到视频: {video_info['bvid']} - {video_info['title']}")
+        logger.info(f"第 {page} 页获取到 {len(page_videos)} 个视频")
+        return page_videos
+
+    def _fetch_page_videos(self, media_id: str, page: int, page_size: int) -> List[Dict[str, Any]]:
+        """请求指定页并提取视频信息，失败时记录日志后抛出"""
+        try:
+            page_data = self._fetch_favorite_page(media_id, page, page_size)
+        except (APIError, requests.RequestException) as e:
+            logger.error(f"获取收藏夹第 {page} 页失败: {e}")
+            raise
+        return self._extract_page_videos(page_data, page)
+
+    def _iter_pages_concurrent(
+        self,
+        media_id: str,
+        pages: List[int],
+        page_size: int,
+        max_workers: int,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """并发请求多个分页，按页码顺序逐页产出（某页就绪即可产出，不等待后续页）"""
+        if not pages:
+            return
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(pages)))
+        futures = [executor.submit(self._fetch_page_videos, media_id, page, page_size) for page in pages]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            # 调用方提前结束迭代时取消尚未开始的分页请求
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _iter_pages_sequential(
+        self,
+        media_id: str,
+        page_size: int,
+        start_page: int = 2,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """无法获取总数时，依靠 has_more 顺序翻页"""
+        page = start_page
+        while True:
+            page_data = self._fetch_favorite_page(media_id, page, page_size)
+            page_videos = self._extract_page_videos(page_data, page)
+            if not page_videos:
+                logger.info(f"第 {page} 页没有更多视频，获取完成")
+                return
+            yield page_videos
+            if not page_data.get("has_more", False):
+                logger.info("已获取所有视频")
+                return
+            page += 1
+
+    def stream_favorite_videos(
         self,
         media_id: str,
         max_count: Optional[int] = None,
         max_workers: int = 4,
-    ) -> Tuple[List[Dict[str, str]], Optional[str]]:
+    ) -> Tuple[Iterator[Dict[str, Any]], Optional[str], int]:
         """
-        获取指定收藏夹的所有视频信息（BV 号和标题），支持并发获取分页数据。
+        流式获取收藏夹视频：只同步请求第一页，之后的分页在后台并发请求，
+        视频按收藏夹顺序逐页产出，调用方可以在列表获取完成之前开始下载。
+
+        安装了 aiohttp 时由 AsyncAPIClient 在后台事件循环上请求分页。
 
         Args:
             media_id: 收藏夹 ID
             max_count: 最大获取数量，None 表示获取全部
-            max_workers: 并发请求的最大线程数（默认 4，避免过度并发触发风控）
+            max_workers: 线程池模式下并发请求的最大线程数
 
         Returns:
-            (视频信息列表, 收藏夹标题)，每个视频信息是 {'bvid': str, 'title': str}
+            (视频信息迭代器, 收藏夹标题, 收藏夹视频总数)；第一页获取失败时返回 (空迭代器, None, 0)。
+            迭代过程中后续分页重试耗尽仍失败时抛出 APIError / requests.RequestException
         """
-        logger.info(f"开始获取收藏夹 {media_id} 的视频列表...")
+        from .async_api_client import ASYNC_AVAILABLE, stream_favorite_videos
+        if ASYNC_AVAILABLE:
+            return stream_favorite_videos(media_id, self.cookie, max_count)
 
+        logger.info(f"开始获取收藏夹 {media_id} 的视频列表...")
         page_size = 20  # B站 API 每页最多 20 个
-        video_list: List[Dict[str, str]] = []
-        favorite_title: Optional[str] = None
 
         # 先请求第一页，获取标题和总数量
-        first_page_url = f"{BilibiliAPI.FAVORITE_INFO}?media_id={media_id}&pn=1&ps={page_size}"
         try:
-            response = requests.get(first_page_url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            first_page = self._fetch_favorite_page(media_id, 1, page_size)
+        except APIError as e:
+            logger.error(f"获取收藏夹视频失败: {e}")
+            return iter(()), None, 0
         except requests.RequestException as e:
             logger.error(f"请求收藏夹第一页时发生异常: {e}")
-            return [], None
-
-        if data.get("code") == -352:
-            logger.error("请求被风控，请尝试添加 Cookie 或稍后再试")
-            return [], None
-        if data.get("code") != 0:
-            logger.error(f"获取收藏夹视频失败: {data.get('message', '未知错误')}")
-            return [], None
+            return iter(()), None, 0
 
-        info = data.get("data", {}).get("info", {}) or {}
+        favorite_title: Optional[str] = None
+        info = first_page.get("info", {}) or {}
         title_from_api = info.get("title")
         if title_from_api:
             from ..utils.playlist import sanitize_filename
@@ -120,160 +192,156 @@ class FavoriteAPIClient:
             logger.info(f"获取到收藏夹标题: {favorite_title}")
 
         media_count = info.get("media_count") or 0
-        medias = data.get("data", {}).get("medias", []) or []
-
-        # 先处理第一页的数据
-        for media in medias:
-            video_info = self._extract_video_info(media)
-            if video_info:
-                video_list.append(video_info)
-                logger.debug(f"[第 1 页] 找到视频: {video_info['bvid']} - {video_info['title']}")
+        first_videos = self._extract_page_videos(first_page, 1)
 
-        logger.info(f"第 1 页获取到 {len(medias)} 个视频")
-
-        # 如果 max_count 很小，或只有一页，直接返回
-        if max_count and len(video_list) >= max_count:
-            return video_list[:max_count], favorite_title
-
-        # 估算总页数：优先使用 media_count；如果没有，再根据 has_more 兜底
-        has_more = data.get("data", {}).get("has_more", False)
-        if media_count and page_size:
+        # 估算总页数：优先使用 media_count；如果没有，再根据 has_more 顺序翻页
+        if media_count:
             total_pages = max(1, math.ceil(media_count / page_size))
+            if max_count:
+                total_pages = min(total_pages, math.ceil(max_count / page_size))
+            logger.info(f"检测到收藏夹共 {media_count} 个视频，约 {total_pages} 页，后续页面并发获取")
+            pages = self._iter_pages_concurrent(
+                media_id, list(range(2, total_pages + 1)), page_size, max_workers
+            )
+        elif first_page.get("has_more", False):
+            logger.info("无法从 API 中获取总视频数，使用顺序分页模式")
+            pages = self._iter_pages_sequential(media_id, page_size)
         else:
-            total_pages = 1
-            if has_more:
-                # 无法可靠获取总数时，回退到旧的顺序循环方式
-                logger.info("无法从 API 中获取总视频数，回退到顺序分页模式")
-                return self._get_favorite_videos_sequential(media_id, max_count)
-
-        if total_pages == 1:
-            logger.info(f"收藏夹 {media_id} 共 1 页，视频总数 {len(video_list)}")
-            return (video_list[:max_count] if max_count else video_list), favorite_title
-
-        logger.info(f"检测到收藏夹共 {media_count} 个视频，约 {total_pages} 页，使用并发方式获取后续页面")
+            pages = iter(())
 
-        # 内部函数：请求指定页码
-        def fetch_page(page: int) -> Tuple[int, List[Dict[str, str]]]:
-            url = f"{BilibiliAPI.FAVORITE_INFO}?media_id={media_id}&pn={page}&ps={page_size}"
+        def videos() -> Iterator[Dict[str, Any]]:
+            count = 0
             try:
-                resp = requests.get(url, headers=self.headers, timeout=10)
-                resp.raise_for_status()
-                page_data = resp.json()
-                if page_data.get("code") != 0:
-                    logger.error(f"获取第 {page} 页失败: {page_data.get('message', '未知错误')}")
-                    return page, []
-
-                medias_page = page_data.get("data", {}).get("medias", []) or []
-                page_videos: List[Dict[str, str]] = []
-                for media in medias_page:
-                    video_info = self._extract_video_info(media)
-                    if video_info:
-                        page_videos.append(video_info)
-                        logger.debug(f"[第 {page} 页] 找到视频: {video_info['bvid']} - {video_info['title']}")
-                logger.info(f"第 {page} 页获取到 {len(page_videos)} 个视频")
-                return page, page_videos
-            except requests.RequestException as e:
-                logger.error(f"请求收藏夹第 {page} 页时发生异常: {e}")
-                return page, []
-
-        # 提交第 2..total_pages 页的任务
-        pages_to_fetch = list(range(2, total_pages + 1))
-        page_results: Dict[int, List[Dict[str, str]]] = {}
-
-        if pages_to_fetch:
-            with ThreadPoolExecutor(max_workers=min(max_workers, len(pages_to_fetch))) as executor:
-                future_map = {executor.submit(fetch_page, p): p for p in pages_to_fetch}
-                for future in as_completed(future_map):
-                    page_index, page_videos = future.result()
-                    page_results[page_index] = page_videos
-                    # 轻微延时，进一步降低风控风险
-                    time.sleep(0.1)
-
-        # 按页码顺序合并结果
-        for page in range(2, total_pages + 1):
-            videos = page_results.get(page, [])
-            video_list.extend(videos)
-            if max_count and len(video_list) >= max_count:
-                break
-
-        if max_count:
-            video_list = video_list[:max_count]
-
-        logger.info(f"收藏夹 {media_id} 共获取 {len(video_list)} 个视频")
-        return video_list, favorite_title
-
-    def _get_favorite_videos_sequential(
+                for page_videos in itertools.chain([first_videos], pages):
+                    for video_info in page_videos:
+                        if max_count and count >= max_count:
+                            return
+                        count += 1
+                        yield video_info
+            finally:
+                if hasattr(pages, "close"):
+                    pages.close()
+                logger.info(f"收藏夹 {media_id} 共获取 {count} 个视频")
+
+        return videos(), favorite_title, media_count
+    
+    def get_favorite_videos(
         self,
         media_id: str,
         max_count: Optional[int] = None,
+        max_workers: int = 4,
     ) -> Tuple[List[Dict[str, str]], Optional[str]]:
         """
-        旧的顺序分页实现，作为无法并发时的回退方案。
+        获取指定收藏夹的所有视频信息（BV 号和标题），支持并发获取分页数据。
+
+        安装了 aiohttp 时由 AsyncAPIClient 在单个事件循环上同时请求所有分页，
+        否则使用线程池并发。
+
+        Args:
+            media_id: 收藏夹 ID
+            max_count: 最大获取数量，None 表示获取全部
+            max_workers: 线程池模式下并发请求的最大线程数（默认 4，避免过度并发触发风控）
+
+        Returns:
+            (视频信息列表, 收藏夹标题)，每个视频信息是 {'bvid': str, 'title': str}；
+            第一页获取失败时返回 ([], None)
+
+        Raises:
+            APIError / requests.RequestException: 后续分页重试耗尽后仍失败
+                （不再静默丢弃该页的视频）
         """
-        video_list: List[Dict[str, str]] = []
-        favorite_title: Optional[str] = None
-        page = 1
-        page_size = 20  # B站 API 每页最多 20 个
+        from .async_api_client import ASYNC_AVAILABLE, fetch_favorite_videos
+        if ASYNC_AVAILABLE:
+            return fetch_favorite_videos(media_id, self.cookie, max_count)
 
-        logger.info(f"[顺序模式] 开始获取收藏夹 {media_id} 的视频列表...")
+        videos, favorite_title, _ = self.stream_favorite_videos(media_id, max_count, max_workers)
+        return list(videos), favorite_title
 
-        while True:
-            if max_count and len(video_list) >= max_count:
-                break
+    def get_favorite_delta(
+        self,
+        media_id: str,
+        known_videos: List[Dict[str, Any]],
+        known_count: int,
+        known_run: Optional[int] = None,
+    ) -> Optional[Tuple[List[Dict[str, Any]], Optional[str], int]]:
+        """
+        增量获取收藏夹：按收藏时间倒序翻页，连续遇到 known_run 个上次已记录的视频即停止，
+        其余部分沿用上次记录的顺序。
 
-            url = f"{BilibiliAPI.FAVORITE_INFO}?media_id={media_id}&pn={page}&ps={page_size}"
+        第一页的 media_count 用作变更信号：media_count 的增量与新增视频数不一致，
+        说明有视频被移出收藏夹，此时返回 None，由调用方改为完整获取。
 
-            try:
-                response = requests.get(url, headers=self.headers, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-
-                if data['code'] == 0:
-                    # 第一页时获取收藏夹标题
-                    if page == 1:
-                        title_from_api = data.get('data', {}).get('info', {}).get('title')
-                        if title_from_api:
-                            from ..utils.playlist import sanitize_filename
-                            favorite_title = sanitize_filename(title_from_api)
-                            logger.info(f"获取到收藏夹标题: {favorite_title}")
-
-                    medias = data['data'].get('medias', [])
-
-                    if not medias:
-                        logger.info(f"第 {page} 页没有更多视频，获取完成")
-                        break
-
-                    # 提取视频信息
-                    for media in medias:
-                        video_info = self._extract_video_info(media)
-                        if video_info:
-                            video_list.append(video_info)
-                            logger.debug(f"找到视频: {video_info['bvid']} - {video_info['title']}")
-
-                    logger.info(f"第 {page} 页获取到 {len(medias)} 个视频")
-
-                    # 检查是否还有更多页
-                    has_more = data['data'].get('has_more', False)
-                    if not has_more:
-                        logger.info("已获取所有视频")
-                        break
-
-                    page += 1
-                    time.sleep(0.5)  # 避免请求过快
-
-                elif data['code'] == -352:
-                    logger.error("请求被风控，请尝试添加 Cookie 或稍后再试")
-                    break
-                else:
-                    logger.error(f"获取收藏夹视频失败: {data.get('message', '未知错误')}")
+        Args:
+            media_id: 收藏夹 ID
+            known_videos: 上次同步记录的视频列表（收藏夹顺序）
+            known_count: 上次同步时接口返回的 media_count
+            known_run: 停止翻页所需的连续已知视频数，None 则使用 DownloadConfig.INCREMENTAL_KNOWN_RUN
+
+        Returns:
+            (视频信息列表, 收藏夹标题, media_count)，沿用上次记录的视频带有 known=True；
+            无法增量同步时返回 None
+        """
+        known_run = known_run or DownloadConfig.INCREMENTAL_KNOWN_RUN
+        known_bvids = {video["bvid"] for video in known_videos}
+        page_size = 20
+
+        try:
+            first_page = self._fetch_favorite_page(media_id, 1, page_size)
+        except (APIError, requests.RequestException) as e:
+            logger.error(f"增量获取收藏夹第一页失败: {e}")
+            return None
+
+        info = first_page.get("info", {}) or {}
+        media_count = info.get("media_count") or 0
+        if not media_count:
+            return None
+        favorite_title: Optional[str] = None
+        if info.get("title"):
+            from ..utils.playlist import sanitize_filename
+            favorite_title = sanitize_filename(info["title"])
+
+        scanned: List[Dict[str, Any]] = []
+        run = 0
+        pages = itertools.chain(
+            [self._extract_page_videos(first_page, 1)],
+            self._iter_pages_sequential(media_id, page_size) if first_page.get("has_more") else (),
+        )
+        try:
+            for page_videos in pages:
+                for video_info in page_videos:
+                    scanned.append(video_info)
+                    run = run + 1 if video_info["bvid"] in known_bvids else 0
+                if run >= known_run:
                     break
+        except (APIError, requests.RequestException) as e:
+            logger.error(f"增量获取收藏夹 {media_id} 失败: {e}")
+            return None
 
-            except requests.RequestException as e:
-                logger.error(f"请求收藏夹视频时发生异常: {e}")
-                break
+        scanned_bvids = {video["bvid"] for video in scanned}
+        remaining = [
+            dict(video, known=True) for video in known_videos if video["bvid"] not in scanned_bvids
+        ]
+        new_count = len(scanned_bvids - known_bvids)
+        if media_count - known_count != new_count:
+            logger.info(
+                f"收藏夹 {media_id} 数量变化不一致（新增 {new_count}，"
+                f"接口 {known_count} -> {media_count}），可能有视频被移除，改为完整同步"
+            )
+            return None
 
-        logger.info(f"[顺序模式] 收藏夹 {media_id} 共获取 {len(video_list)} 个视频")
-        return video_list, favorite_title
+        logger.info(
+            f"增量同步收藏夹 {media_id}: 扫描 {len(scanned)} 个，新增 {new_count} 个，"
+            f"沿用记录 {len(remaining)} 个"
+        )
+        return scanned + remaining, favorite_title, media_count
+
+    @staticmethod
+    def parse_media_id(favorite_url: str) -> Optional[str]:
+        """从收藏夹 URL 中提取收藏夹 ID，失败返回 None"""
+        match = re.search(r'[?&]fid=(\d+)', favorite_url)
+        if not match:
+            match = re.search(r'/(\d+)(?:\?|$)', favorite_url)
+        return match.group(1) if match else None
     
     def get_favorite_videos_by_url(
         self, 
@@ -288,13 +356,8 @@ class FavoriteAPIClient:
         Returns:
             (视频信息列表, 收藏夹标题)
         """
-        # 从 URL 中提取收藏夹 ID
-        match = re.search(r'[?&]fid=(\d+)', favorite_url)
-        if not match:
-            match = re.search(r'/(\d+)(?:\?|$)', favorite_url)
-        
-        if match:
-            media_id = match.group(1)
+        media_id = self.parse_media_id(favorite_url)
+        if media_id:
             logger.info(f"从 URL 中提取到收藏夹 ID: {media_id}")
             return self.get_favorite_videos(media_id)
         else:
@@ -305,78 +368,142 @@ class FavoriteAPIClient:
 class VideoAPIClient:
     """视频 API 客户端：获取视频信息和下载链接"""
 
-    def __init__(self, cookie: Optional[str] = None):
+    def __init__(
+        self,
+        cookie: Optional[str] = None,
+        info_cache: Optional[VideoInfoCache] = None,
+        quality_policy: Optional[AudioQualityPolicy] = None,
+    ):
         """
         初始化 API 客户端
         
         Args:
             cookie: B站 Cookie 字符串（可选，某些操作可能需要）
+            info_cache: 视频元数据缓存，None 则使用进程内共享的缓存
+            quality_policy: 音频流质量策略，None 则按配置创建
         """
         self.cookie = cookie
         self.headers = DownloadConfig.REQUEST_HEADERS.copy()
         if cookie:
             self.headers["Cookie"] = cookie
+        self.info_cache = info_cache or get_video_info_cache()
+        self.quality_policy = quality_policy or AudioQualityPolicy()
             
-    def get_video_info(self, bvid: str) -> Optional[Dict[str, Any]]:
+    def get_video_info(self, bvid: str, refresh: bool = False) -> Optional[Dict[str, Any]]:
         """
-        获取视频信息（如标题、cid）
+        获取视频信息（如标题、cid），优先读取元数据缓存
         
         Args:
             bvid: 视频 BV 号
+            refresh: 是否忽略缓存强制请求接口
             
         Returns:
-            包含视频信息的字典，失败则返回 None
+            包含视频信息的字典，失败或视频已失效则返回 None
         """
+        if not refresh:
+            hit, info = self.info_cache.get(bvid)
+            if hit:
+                if info is None:
+                    logger.debug(f"视频已失效（负缓存）: {bvid}")
+                return info
+
         url = f"{BilibiliAPI.VIDEO_INFO}?bvid={bvid}"
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data['code'] == 0:
-                return data['data']
-            else:
-                logger.error(f"获取视频信息失败 ({bvid}): {data.get('message', '未知错误')}")
-                return None
-                
+            info = get_api_data(url, rate_limiter.VIDEO_INFO, self.headers)
+            if info:
+                self.info_cache.put(bvid, info)
+            return info
+        except APIError as e:
+            logger.error(f"获取视频信息失败 ({bvid}): {e}")
+            if not e.retryable:
+                self.info_cache.put_negative(bvid, e.code)
+            return None
         except requests.RequestException as e:
             logger.error(f"请求视频信息时发生异常 ({bvid}): {e}")
             return None
             
-    def get_audio_url(self, bvid: str, cid: int) -> Tuple[Optional[str], int]:
+    @staticmethod
+    def _parse_audio_urls(
+        data: Optional[Dict[str, Any]],
+        policy: Optional[AudioQualityPolicy] = None,
+    ) -> Tuple[List[str], int]:
         """
-        获取音频下载链接和时长
+        按质量策略从 playurl 接口的 data 字段中选出一条音频流
+
+        Args:
+            data: playurl 接口的 data 字段
+            policy: 质量策略，None 则按配置创建
+
+        Returns:
+            (候选 URL 列表, 时长)，列表首项为 baseUrl，其后为 backupUrl 中的镜像节点
+        """
+        data = data or {}
+        dash_data = data.get('dash') or {}
+        # B站接口返回的timelength单位是毫秒
+        duration_ms = data.get('timelength', 0)
+        duration = duration_ms // 1000 if duration_ms else 0
+
+        audio = (policy or AudioQualityPolicy()).select(dash_data)
+        if not audio:
+            return [], duration
+        logger.debug(f"选用音频流 id={audio.get('id')} 码率={audio.get('bandwidth', 0) // 1000}kbps")
+        candidates = [audio.get('baseUrl') or audio.get('base_url')]
+        candidates += audio.get('backupUrl') or audio.get('backup_url') or []
+        return list(dict.fromkeys(url for url in candidates if url)), duration
+
+    @staticmethod
+    def _parse_audio_url(
+        data: Optional[Dict[str, Any]],
+        policy: Optional[AudioQualityPolicy] = None,
+    ) -> Tuple[Optional[str], int]:
+        """按质量策略从 playurl 接口的 data 字段中选出音频流，返回 (音频 URL, 时长)"""
+        urls, duration = VideoAPIClient._parse_audio_urls(data, policy)
+        return (urls[0] if urls else None), duration
+
+    def get_audio_urls(self, bvid: str, cid: int) -> Tuple[List[str], int]:
+        """
+        获取音频的所有候选下载链接（主节点与备用镜像）和时长
         
         Args:
             bvid: 视频 BV 号
             cid: 视频 CID
             
         Returns:
-            (音频 URL, 时长)，失败则返回 (None, 0)
+            (候选 URL 列表, 时长)，失败则返回 ([], 0)
         """
-        url = f"{BilibiliAPI.VIDEO_PLAY_URL}?bvid={bvid}&cid={cid}&fnval=16"
+        url = (
+            f"{BilibiliAPI.VIDEO_PLAY_URL}?bvid={bvid}&cid={cid}"
+            f"&fnval={self.quality_policy.fnval}"
+        )
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            if data['code'] == 0:
-                dash_data = data.get('data', {}).get('dash', {})
-                # B站接口返回的timelength单位是毫秒
-                duration_ms = data.get('data', {}).get('timelength', 0)
-                duration = duration_ms // 1000 if duration_ms else 0
-                
-                # 在 dash 音频流中寻找最高码率的音频
-                audio_streams = dash_data.get('audio', [])
-                if audio_streams:
-                    best_audio = max(audio_streams, key=lambda x: x.get('bandwidth', 0))
-                    audio_url = best_audio.get('baseUrl')
-                    logger.info(f"成功获取音频链接 ({bvid})")
-                    return audio_url, duration
-            
-            logger.error(f"获取音频链接失败 ({bvid}): {data.get('message', '未知错误')}")
-            return None, 0
-
+            data = get_api_data(url, rate_limiter.PLAY_URL, self.headers)
+        except APIError as e:
+            logger.error(f"获取音频链接失败 ({bvid}): {e}")
+            return [], 0
         except requests.RequestException as e:
             logger.error(f"请求音频链接时发生异常 ({bvid}): {e}")
+            return [], 0
+
+        audio_urls, duration = self._parse_audio_urls(data, self.quality_policy)
+        if audio_urls:
+            logger.info(f"成功获取音频链接 ({bvid})，候选节点 {len(audio_urls)} 个")
+            return audio_urls, duration
+
+        logger.error(f"获取音频链接失败 ({bvid}): 没有可用的音频流")
+        return [], 0
+
+    def get_audio_url(self, bvid: str, cid: int) -> Tuple[Optional[str], int]:
+        """
+        获取音频下载链接和时长
+        
+        Args:
+            bvid: 视频 BV 号
+            cid: 视频 CID
+            
+        Returns:
+            (音频 URL, 时长)，失败则返回 (None, 0)
+        """
+        audio_urls, duration = self.get_audio_urls(bvid, cid)
+        if not audio_urls:
             return None, 0
+        return audio_urls[0], duration
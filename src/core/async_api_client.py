@@ -0,0 +1,299 @@
+"""基于 asyncio 的 Bilibili API 客户端：在单个事件循环上并发大量请求"""
+
+import asyncio
+import math
+import queue
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Iterator, AsyncIterator
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖，缺失时同步客户端回退到线程池
+    aiohttp = None
+
+from ..config import BilibiliAPI, DownloadConfig
+from ..utils import get_logger
+from . import rate_limiter
+from .api_client import FavoriteAPIClient
+from .rate_limiter import THROTTLE_API_CODES, THROTTLE_STATUS_CODES, get_rate_limiter
+from .retry import APIError, RetryPolicy
+
+logger = get_logger(__name__)
+
+ASYNC_AVAILABLE = aiohttp is not None
+
+
+class AsyncAPIClient:
+    """异步 API 客户端：收藏夹的所有分页共用一个事件循环和连接池，无需每请求一个线程"""
+
+    def __init__(self, cookie: Optional[str] = None, max_concurrency: Optional[int] = None):
+        """
+        初始化异步 API 客户端
+
+        Args:
+            cookie: B站 Cookie 字符串（可选）
+            max_concurrency: 同时在途的最大请求数，None 则使用 DownloadConfig.ASYNC_MAX_CONCURRENCY
+        """
+        if not ASYNC_AVAILABLE:
+            raise ImportError("异步 API 客户端需要安装 aiohttp: pip install aiohttp")
+        self.cookie = cookie
+        self.headers = DownloadConfig.REQUEST_HEADERS.copy()
+        if cookie:
+            self.headers["Cookie"] = cookie
+        self.max_concurrency = max_concurrency or DownloadConfig.ASYNC_MAX_CONCURRENCY
+        self._policy = RetryPolicy()
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncAPIClient":
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+        self._session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self._policy.timeout),
+            cookie_jar=aiohttp.DummyCookieJar(),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self._session.close()
+        self._session = None
+
+    async def _get_api_data(self, url: str, family: str) -> Any:
+        """经过接口族限速器与重试策略发起请求，返回 data 字段；失败时抛出 APIError 或 aiohttp 异常"""
+        limiter = get_rate_limiter(family)
+
+        async def attempt() -> Any:
+            await limiter.acquire_async()
+            async with self._semaphore:
+                async with self._session.get(url) as response:
+                    if response.status in THROTTLE_STATUS_CODES:
+                        limiter.on_throttled()
+                    response.raise_for_status()
+                    payload = await response.json(content_type=None)
+            code = payload.get("code")
+            if code in THROTTLE_API_CODES:
+                limiter.on_throttled()
+            else:
+                limiter.on_success()
+            if code != 0:
+                raise APIError(code, payload.get("message", ""))
+            return payload.get("data")
+
+        return await self._policy.call_async(attempt, description=url)
+
+    async def _fetch_favorite_page(self, media_id: str, page: int, page_size: int) -> Dict[str, Any]:
+        """请求收藏夹的一页，返回 data 字段；重试耗尽后抛出异常"""
+        url = f"{BilibiliAPI.FAVORITE_INFO}?media_id={media_id}&pn={page}&ps={page_size}&order=mtime"
+        try:
+            return await self._get_api_data(url, rate_limiter.FAVORITE) or {}
+        except (APIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"获取收藏夹第 {page} 页失败: {e}")
+            raise
+
+    @staticmethod
+    def _extract_page_videos(page_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        videos = []
+        for media in page_data.get("medias") or []:
+            video_info = FavoriteAPIClient._extract_video_info(media)
+            if video_info:
+                videos.append(video_info)
+        return videos
+
+    async def open_favorite(
+        self,
+        media_id: str,
+        max_count: Optional[int] = None,
+    ) -> Tuple[Optional[str], int, AsyncIterator[List[Dict[str, Any]]]]:
+        """
+        请求收藏夹第一页，并立即为其余分页创建并发任务
+
+        Args:
+            media_id: 收藏夹 ID
+            max_count: 最大获取数量，None 表示获取全部
+
+        Returns:
+            (收藏夹标题, 视频总数, 按页码顺序产出每页视频的异步迭代器)；
+            第一页获取失败时标题为 None、总数为 0、迭代器为空。
+            后续分页重试耗尽仍失败时，迭代器抛出 APIError / aiohttp.ClientError
+        """
+        logger.info(f"[异步] 开始获取收藏夹 {media_id} 的视频列表...")
+        page_size = 20  # B站 API 每页最多 20 个
+
+        try:
+            first_page = await self._fetch_favorite_page(media_id, 1, page_size)
+        except (APIError, aiohttp.ClientError, asyncio.TimeoutError):
+            first_page = None
+        tasks: List[asyncio.Task] = []
+
+        async def pages() -> AsyncIterator[List[Dict[str, Any]]]:
+            if first_page is None:
+                return
+            count = 0
+
+            def take(page_videos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                nonlocal count
+                if max_count:
+                    page_videos = page_videos[:max(0, max_count - count)]
+                count += len(page_videos)
+                return page_videos
+
+            yield take(self._extract_page_videos(first_page))
+            try:
+                if tasks:
+                    for task in tasks:
+                        yield take(self._extract_page_videos(await task))
+                else:
+                    # 无法获取总数时只能依靠 has_more 顺序翻页
+                    page, has_more = 1, first_page.get("has_more", False)
+                    while has_more and not (max_count and count >= max_count):
+                        page += 1
+                        page_data = await self._fetch_favorite_page(media_id, page, page_size)
+                        yield take(self._extract_page_videos(page_data))
+                        has_more = page_data.get("has_more", False)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                logger.info(f"[异步] 收藏夹 {media_id} 共获取 {count} 个视频")
+
+        if first_page is None:
+            return None, 0, pages()
+
+        info = first_page.get("info") or {}
+        favorite_title = None
+        if info.get("title"):
+            from ..utils.playlist import sanitize_filename
+            favorite_title = sanitize_filename(info["title"])
+            logger.info(f"获取到收藏夹标题: {favorite_title}")
+
+        media_count = info.get("media_count") or 0
+        if media_count:
+            total_pages = max(1, math.ceil(media_count / page_size))
+            if max_count:
+                total_pages = min(total_pages, math.ceil(max_count / page_size))
+            tasks.extend(
+                asyncio.ensure_future(self._fetch_favorite_page(media_id, page, page_size))
+                for page in range(2, total_pages + 1)
+            )
+        return favorite_title, media_count, pages()
+
+    async def get_favorite_videos(
+        self,
+        media_id: str,
+        max_count: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        获取收藏夹的所有视频信息，第一页之后的所有分页同时发出
+
+        Args:
+            media_id: 收藏夹 ID
+            max_count: 最大获取数量，None 表示获取全部
+
+        Returns:
+            (视频信息列表, 收藏夹标题)；第一页获取失败时返回 ([], None)
+
+        Raises:
+            APIError / aiohttp.ClientError: 后续分页重试耗尽后仍失败
+        """
+        favorite_title, _, pages = await self.open_favorite(media_id, max_count)
+        video_list: List[Dict[str, Any]] = []
+        async for page_videos in pages:
+            video_list.extend(page_videos)
+        return video_list, favorite_title
+
+
+def _run(coro_factory, cookie: Optional[str], max_concurrency: Optional[int]):
+    """在新的事件循环上运行一次异步客户端调用，供同步代码使用"""
+    async def runner():
+        async with AsyncAPIClient(cookie, max_concurrency) as client:
+            return await coro_factory(client)
+    return asyncio.run(runner())
+
+
+def fetch_favorite_videos(
+    media_id: str,
+    cookie: Optional[str] = None,
+    max_count: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """AsyncAPIClient.get_favorite_videos 的同步包装"""
+    return _run(lambda client: client.get_favorite_videos(media_id, max_count), cookie, max_concurrency)
+
+
+def stream_favorite_videos(
+    media_id: str,
+    cookie: Optional[str] = None,
+    max_count: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+) -> Tuple[Iterator[Dict[str, Any]], Optional[str], int]:
+    """
+    AsyncAPIClient.open_favorite 的同步包装：事件循环在后台线程中运行，
+    每页视频就绪后立即通过队列交给调用方
+
+    调用方停止迭代（提前 break、抛出异常或迭代器被回收）时后台线程随之停止，
+    尚未完成的分页请求被取消。
+
+    Returns:
+        (视频信息迭代器, 收藏夹标题, 视频总数)
+    """
+    pipe: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+    stop = threading.Event()
+    running: Dict[str, Any] = {}
+
+    async def produce():
+        running["loop"] = asyncio.get_running_loop()
+        running["task"] = asyncio.current_task()
+        async with AsyncAPIClient(cookie, max_concurrency) as client:
+            favorite_title, media_count, pages = await client.open_favorite(media_id, max_count)
+            pipe.put(("header", (favorite_title, media_count)))
+            try:
+                async for page_videos in pages:
+                    if stop.is_set():
+                        break
+                    pipe.put(("page", page_videos))
+            finally:
+                # 关闭分页迭代器，取消其余分页任务
+                await pages.aclose()
+
+    def cancel() -> None:
+        stop.set()
+        loop, task = running.get("loop"), running.get("task")
+        if loop and task:
+            try:
+                # 正在等待某一页时也立即中断
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # 事件循环已结束
+
+    def run():
+        try:
+            asyncio.run(produce())
+        except BaseException as e:
+            pipe.put(("error", e))
+        else:
+            pipe.put(("done", None))
+
+    threading.Thread(target=run, name="favorite-listing", daemon=True).start()
+
+    kind, payload = pipe.get()
+    if kind != "header":
+        if kind == "error":
+            logger.error(f"获取收藏夹 {media_id} 失败: {payload}")
+        return iter(()), None, 0
+    favorite_title, media_count = payload
+
+    def videos() -> Iterator[Dict[str, Any]]:
+        try:
+            while True:
+                kind, payload = pipe.get()
+                if kind == "page":
+                    yield from payload
+                elif kind == "error":
+                    raise payload
+                else:
+                    return
+        finally:
+            cancel()
+
+    return videos(), favorite_title, media_count
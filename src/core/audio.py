@@ -1,25 +1,60 @@
 """Audio download and M4A metadata helpers."""
 
+import json
+import math
 import os
+import re
+import threading
 import time
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 
 import requests
-from mutagen.mp4 import MP4, MP4Cover
+from mutagen.mp4 import MP4, MP4Cover, MP4FreeForm
 
-from ..config import DownloadConfig
+from ..config import DownloadConfig, settings
 from ..utils import get_logger
+from ..utils.content_store import ContentStore
+from ..utils.dir_index import DirectoryIndex
+from ..utils.file_lock import FileLock
+from ..utils.host_stats import get_host_stats, host_of
+from ..utils.library_scan import BVID_TAG, CID_TAG, DOWNLOADED_AT_TAG
 from ..utils.playlist import sanitize_filename
+from ..utils.tag_state import TagStateStore, get_tag_state_store
 from .api_client import VideoAPIClient
+from . import rate_limiter
+from .http import get_session
+from .rate_limiter import THROTTLE_STATUS_CODES, get_rate_limiter
 
 logger = get_logger(__name__)
 
 
+class _StreamStalled(Exception):
+    """A mirror delivered too little data within the stall window."""
+
+
 class AudioDownloader:
     """Download Bilibili audio streams and fill missing M4A tags."""
 
-    def __init__(self, cookie: Optional[str] = None):
+    def __init__(
+        self,
+        cookie: Optional[str] = None,
+        directory_index: Optional[DirectoryIndex] = None,
+        tag_state: Optional[TagStateStore] = None,
+    ):
         self.api_client = VideoAPIClient(cookie)
+        # Existence checks are answered from one directory listing per folder.
+        self.directory_index = directory_index or DirectoryIndex()
+        # Files whose tags were complete at a known size/mtime are not reopened.
+        self.tag_state = tag_state or get_tag_state_store()
+        self._path_locks = {}
+        self._path_locks_guard = threading.Lock()
+
+    def _lock_for(self, file_path: str) -> threading.Lock:
+        """Return the lock serialising concurrent writers of one target file."""
+        with self._path_locks_guard:
+            return self._path_locks.setdefault(os.path.normcase(file_path), threading.Lock())
 
     def download_audio(
         self,
@@ -27,12 +62,56 @@ class AudioDownloader:
         save_path: str,
         title: Optional[str] = None,
         album: Optional[str] = None,
+        cid: Optional[int] = None,
+        artist: Optional[str] = None,
+        cover_url: Optional[str] = None,
+        duration: Optional[int] = None,
     ) -> Optional[Tuple[str, str, int]]:
-        """Download one video's audio, or reuse the same named local file."""
-        clean_title = sanitize_filename(title) if title else None
-        video_info = self.api_client.get_video_info(bv_number)
-        if not video_info:
+        """Download one video's audio, or reuse the same named local file.
+
+        When the favorite listing already supplied ``cid`` and ``title`` the
+        view API round trip is skipped and the listing fields are used for tags.
+        This runs the ``resolve`` / ``fetch`` / ``ensure_metadata`` stages in
+        sequence; ``DownloadScheduler`` runs them as a pipeline instead.
+        """
+        job = self.resolve(bv_number, save_path, title, album, cid, artist, cover_url, duration)
+        if not job or not self.fetch(job):
             return None
+        self.ensure_metadata(file_path=job["file_path"], **job["metadata"])
+        return job["title"], job["file_path"], job["duration"]
+
+    def resolve(
+        self,
+        bv_number: str,
+        save_path: str,
+        title: Optional[str] = None,
+        album: Optional[str] = None,
+        cid: Optional[int] = None,
+        artist: Optional[str] = None,
+        cover_url: Optional[str] = None,
+        duration: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Work out the target file, tags and stream URLs for one video.
+
+        Returns a job dict (``bvid``, ``title``, ``file_path``, ``metadata``,
+        ``cid``, ``duration``, ``audio_urls``, ``resolved_at``,
+        ``content_path``, ``existing``) or None when the video cannot be resolved. The
+        playurl is skipped when the target file or its stored copy already
+        exists; ``fetch`` resolves it lazily if it is still needed.
+        """
+        clean_title = sanitize_filename(title) if title else None
+        if cid and clean_title:
+            video_info = {
+                "title": title,
+                "cid": cid,
+                "owner": {"name": artist},
+                "pic": cover_url,
+                "duration": duration,
+            }
+        else:
+            video_info = self.api_client.get_video_info(bv_number)
+            if not video_info:
+                return None
 
         api_title = video_info.get("title")
         clean_title = clean_title or sanitize_filename(api_title or "")
@@ -40,37 +119,168 @@ class AudioDownloader:
             logger.error(f"Unable to determine title: {bv_number}")
             return None
 
-        file_path = os.path.join(save_path, f"{clean_title}.m4a")
-        metadata = {
-            "title": api_title or title,
-            "artist": (video_info.get("owner") or {}).get("name"),
-            "album": album,
-            "cover_url": video_info.get("pic"),
+        job = {
+            "bvid": bv_number,
+            "title": clean_title,
+            "file_path": os.path.join(save_path, f"{clean_title}.m4a"),
+            "metadata": {
+                "title": api_title or title,
+                "artist": (video_info.get("owner") or {}).get("name"),
+                "album": album,
+                "cover_url": video_info.get("pic"),
+                "bv_number": bv_number,
+                "cid": video_info.get("cid"),
+            },
+            "cid": video_info.get("cid"),
+            "duration": video_info.get("duration") or 0,
+            "audio_urls": [],
+            "resolved_at": 0.0,
+            "content_path": None,
+            "existing": False,
         }
-        if os.path.exists(file_path):
-            logger.info(f"File already exists, skipping download: {clean_title}")
-            self.ensure_metadata(file_path=file_path, **metadata)
-            return clean_title, file_path, 0
-
-        cid = video_info.get("cid")
-        if not cid:
-            logger.error(f"Unable to get CID: {bv_number}")
+        store = ContentStore.for_save_path(save_path)
+        if store and job["cid"]:
+            job["content_path"] = store.path_for(bv_number, job["cid"])
+        have_audio = self.directory_index.exists(job["file_path"]) or (
+            job["content_path"] and self.directory_index.exists(job["content_path"])
+        )
+        if not have_audio and not self._resolve_stream(job):
             return None
+        return job
 
-        audio_url, duration = self.api_client.get_audio_url(bv_number, cid)
-        if not audio_url:
-            logger.warning(f"Unable to find audio stream: {bv_number}")
-            return None
+    def fetch(self, job: Dict[str, Any]) -> bool:
+        """Download the stream of a resolved job unless the file already exists.
 
-        logger.info(f"Downloading audio: {clean_title}")
-        referer_url = f"https://www.bilibili.com/video/{bv_number}/"
-        if not self._download_file(audio_url, file_path, referer_url):
-            logger.error(f"Audio download failed: {clean_title}")
-            return None
+        With the content store enabled the stream is downloaded once into the
+        store (keyed by BV number and cid) and the favorite folder gets a link
+        to it, so a track shared by several favorites hits the network and the
+        disk once. The playurl is re-resolved first when it has expired (or is
+        about to) while the job waited in the queue.
+
+        A folder file that is already on disk is not downloaded again:
+        ``job["existing"]`` is set, and the file is adopted into the store
+        (see ``_adopt``) so the cache can point at the stored copy.
+        """
+        file_path = job["file_path"]
+        # Different videos may share a title; never let two workers write one file.
+        with self._lock_for(file_path):
+            if self.directory_index.exists(file_path):
+                logger.info(f"File already exists, skipping download: {job['title']}")
+                job["existing"] = True
+                self._adopt(job)
+                return True
+
+            content_path = job["content_path"]
+            if not content_path:
+                return self._fetch_stream(job, file_path)
+
+            with self._lock_for(content_path):
+                if not self.directory_index.exists(content_path):
+                    if not self._fetch_stream(job, content_path):
+                        return False
+                else:
+                    logger.info(f"Reusing stored audio: {job['title']}")
+            if not ContentStore.link(content_path, file_path):
+                return False
+            self.directory_index.add(file_path)
+        return True
+
+    def _adopt(self, job: Dict[str, Any]) -> None:
+        """Hard-link an existing folder file into the store at ``content_path``.
+
+        Only a hard link is used: a symlink or copy in the store would either
+        dangle once the folder is deleted or duplicate the audio. When the
+        link cannot be made ``content_path`` is cleared, so the caller records
+        the folder file itself.
+        """
+        content_path = job["content_path"]
+        if not content_path:
+            return
+        with self._lock_for(content_path):
+            if self.directory_index.exists(content_path):
+                return
+            try:
+                os.makedirs(os.path.dirname(content_path), exist_ok=True)
+                os.link(job["file_path"], content_path)
+            except FileExistsError:
+                pass
+            except OSError as e:
+                logger.debug(f"Unable to adopt {job['file_path']} into the store: {e}")
+                job["content_path"] = None
+                return
+            self.directory_index.add(content_path)
+
+    def place_cached(self, cached_path: str, save_path: str, name: str) -> str:
+        """Make a cached download appear in ``save_path`` and return its path there.
+
+        With the content store enabled, a file cached for another folder (or
+        kept in the store) is linked into this folder as ``<name>.m4a``;
+        otherwise, or if linking fails, the cached path is returned unchanged.
+        """
+        if not ContentStore.for_save_path(save_path):
+            return cached_path
+        if os.path.normcase(os.path.dirname(os.path.abspath(cached_path))) == os.path.normcase(
+            os.path.abspath(save_path)
+        ):
+            return cached_path
+        target = os.path.join(save_path, f"{name}.m4a")
+        with self._lock_for(target):
+            if not self.directory_index.exists(target):
+                if not ContentStore.link(cached_path, target):
+                    return cached_path
+                self.directory_index.add(target)
+        return target
+
+    def _fetch_stream(self, job: Dict[str, Any], dest: str) -> bool:
+        """Download the job's stream to ``dest``, re-resolving an expired playurl."""
+        if not job["audio_urls"] or self._playurl_expired(job):
+            if job["audio_urls"]:
+                logger.info(f"Playurl expired, resolving again: {job['bvid']}")
+            if not self._resolve_stream(job):
+                return False
 
-        logger.info(f"Audio download completed: {clean_title}")
-        self.ensure_metadata(file_path=file_path, **metadata)
-        return clean_title, file_path, duration
+        # The store directory only exists once something has been put there.
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        # Another instance sharing the library may be fetching the same file;
+        # wait for it instead of writing the same .part concurrently.
+        with FileLock.for_target(dest):
+            if os.path.exists(dest):
+                logger.info(f"Downloaded by another process, skipping: {job['title']}")
+                self.directory_index.add(dest)
+                return True
+            logger.info(f"Downloading audio: {job['title']}")
+            referer_url = f"https://www.bilibili.com/video/{job['bvid']}/"
+            if not self._download_file(job["audio_urls"], dest, referer_url):
+                logger.error(f"Audio download failed: {job['title']}")
+                return False
+        self.directory_index.add(dest)
+        logger.info(f"Audio download completed: {job['title']}")
+        return True
+
+    def _resolve_stream(self, job: Dict[str, Any]) -> bool:
+        """Fill ``audio_urls`` and the stream duration of a job from the playurl API."""
+        if not job["cid"]:
+            logger.error(f"Unable to get CID: {job['bvid']}")
+            return False
+        audio_urls, stream_duration = self.api_client.get_audio_urls(job["bvid"], job["cid"])
+        if not audio_urls:
+            logger.warning(f"Unable to find audio stream: {job['bvid']}")
+            return False
+        job["audio_urls"] = audio_urls
+        job["duration"] = stream_duration or job["duration"]
+        job["resolved_at"] = time.time()
+        return True
+
+    @staticmethod
+    def _playurl_expired(job: Dict[str, Any]) -> bool:
+        """Whether the job's stream URLs expire within ``PLAYURL_REFRESH_MARGIN``.
+
+        Stream URLs carry a ``deadline`` (unix time) query parameter; without
+        one, ``PLAYURL_TTL`` from resolution time is assumed.
+        """
+        deadline = parse_qs(urlparse(job["audio_urls"][0]).query).get("deadline", [""])[0]
+        expires = int(deadline) if deadline.isdigit() else job["resolved_at"] + DownloadConfig.PLAYURL_TTL
+        return time.time() >= expires - DownloadConfig.PLAYURL_REFRESH_MARGIN
 
     def ensure_metadata(
         self,
@@ -80,8 +290,37 @@ class AudioDownloader:
         album: Optional[str] = None,
         cover_url: Optional[str] = None,
         bv_number: Optional[str] = None,
-    ) -> None:
-        """Fill missing M4A metadata without overwriting existing values."""
+        cid: Optional[int] = None,
+    ) -> bool:
+        """Fill missing M4A metadata without overwriting existing values.
+
+        Returns True when the file was rewritten.
+
+        Besides the display tags, the BV number, cid and download time are
+        written as ``----:com.tsbot:*`` freeform atoms so ``scan_library`` can
+        rebuild the download cache from the files alone.
+
+        The tags found (or written) are recorded against the file's size and
+        mtime, so an unchanged file that already has every wanted tag is
+        skipped without parsing it.
+        """
+        wanted = {
+            key for key, value in (
+                ("\xa9nam", title or bv_number),
+                ("\xa9ART", artist or bv_number),
+                ("\xa9alb", album),
+                ("covr", cover_url or bv_number),
+                (BVID_TAG, bv_number),
+                (CID_TAG, cid),
+            ) if value
+        }
+        stat = self.directory_index.stat(file_path)
+        if stat:
+            present = self.tag_state.present_tags(file_path, stat)
+            if present is not None and wanted <= present:
+                logger.debug(f"Metadata already complete, skipping: {file_path}")
+                return False
+
         try:
             audio = MP4(file_path)
             if audio.tags is None:
@@ -110,16 +349,39 @@ class AudioDownloader:
                     tags["covr"] = [cover]
                     changed = True
 
+            if bv_number and not tags.get(BVID_TAG):
+                # The file's mtime is when the stream finished downloading.
+                downloaded_at = int(stat[1]) if stat else int(time.time())
+                tags[BVID_TAG] = [MP4FreeForm(bv_number.encode("utf-8"))]
+                tags[DOWNLOADED_AT_TAG] = [MP4FreeForm(str(downloaded_at).encode("utf-8"))]
+                changed = True
+            if cid and not tags.get(CID_TAG):
+                tags[CID_TAG] = [MP4FreeForm(str(cid).encode("utf-8"))]
+                changed = True
+
             if changed:
                 audio.save()
+                self.directory_index.add(file_path)
+                stat = self.directory_index.stat(file_path)
                 logger.info(f"Filled missing audio metadata: {file_path}")
+            if stat:
+                self.tag_state.record(
+                    file_path,
+                    stat,
+                    [
+                        key for key in ("\xa9nam", "\xa9ART", "\xa9alb", "covr", BVID_TAG, CID_TAG)
+                        if tags.get(key)
+                    ],
+                )
+            return changed
         except Exception as e:
             logger.warning(f"Unable to fill audio metadata ({file_path}): {e}")
+            return False
 
     def _download_cover(self, url: str) -> Optional[MP4Cover]:
         """Download a cover image and wrap it for MP4 tags."""
         try:
-            response = requests.get(
+            response = get_session().get(
                 url,
                 headers=self.api_client.headers,
                 timeout=DownloadConfig.NETWORK_TIMEOUT,
@@ -135,34 +397,347 @@ class AudioDownloader:
             logger.warning(f"Unable to download cover ({url}): {e}")
             return None
 
-    def _download_file(self, url: str, file_path: str, referer: str) -> bool:
-        """Download an audio stream with retries."""
+    def _download_file(self, urls: List[str], file_path: str, referer: str) -> bool:
+        """Download an audio stream with retries paced by the stream rate limiter.
+
+        Bytes go to ``<file_path>.part`` and each retry (or a later run) resumes
+        from the part file's size with a Range request. ``<file_path>.part.json``
+        records which stream the part file holds (URL paths, length and
+        validators); a part file of another stream, e.g. after a quality or
+        login change, is discarded instead of being resumed, and ``If-Range``
+        makes the server send the whole stream again if it has changed. The
+        part file is moved into place atomically only once the full length has
+        been received, so a file at ``file_path`` is always complete. Fresh streams larger than
+        ``segment_threshold_mb`` are fetched over several connections instead:
+        a one-byte range request (closed before the segments start) tells the
+        size and whether ranges work. Segmenting is tried at most once per
+        file; if it fails the stream is fetched on a single connection.
+
+        ``urls`` are mirrors of the same stream. They are tried fastest-first by
+        remembered per-host throughput, and a host that stalls is abandoned for
+        the next one, resuming from the bytes already on disk.
+        """
         headers = self.api_client.headers.copy()
         headers["Referer"] = referer
+        # Byte offsets only make sense on the identity encoding.
+        headers["Accept-Encoding"] = "identity"
+        limiter = get_rate_limiter(rate_limiter.STREAM)
+        host_stats = get_host_stats()
+        urls = host_stats.rank(urls)
+        part_path = f"{file_path}.part"
+        # Mirrors of one stream share the URL path; the query only carries auth.
+        stream_paths = sorted({urlparse(url).path for url in urls})
+        # Every mirror gets at least one attempt.
+        attempts = DownloadConfig.MAX_RETRIES + len(urls) - 1
+        segmenting = True
 
-        for retry in range(DownloadConfig.MAX_RETRIES):
+        for attempt in range(attempts):
+            url = urls[attempt % len(urls)]
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            part_meta = self._load_part_meta(part_path) if offset else None
+            if offset and not (part_meta and set(part_meta.get("paths", ())) & set(stream_paths)):
+                logger.info(f"Partial download belongs to another stream, starting over: {part_path}")
+                self._discard_part(part_path)
+                offset, part_meta = 0, None
+            request_headers = dict(headers)
+            if offset:
+                request_headers["Range"] = f"bytes={offset}-"
+                validator = part_meta.get("etag") or part_meta.get("last_modified")
+                if validator and not validator.startswith("W/"):
+                    request_headers["If-Range"] = validator
+            if segmenting and not offset:
+                segmenting = False
+                segmented_size = self._segmented_size(url, headers)
+                if segmented_size:
+                    if self._download_segmented(urls, headers, file_path, segmented_size):
+                        return True
+                    logger.info(f"Falling back to a single connection: {os.path.basename(file_path)}")
+            limiter.acquire()
             try:
-                response = requests.get(
+                with get_session().get(
                     url,
-                    headers=headers,
-                    timeout=DownloadConfig.NETWORK_TIMEOUT,
+                    headers=request_headers,
+                    timeout=(DownloadConfig.NETWORK_TIMEOUT, DownloadConfig.STALL_TIMEOUT),
                     stream=True,
-                )
-                if response.status_code == 200:
-                    with open(file_path, "wb") as audio_file:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            audio_file.write(chunk)
-                    return True
+                ) as response:
+                    if response.status_code == 416 and offset:
+                        # The part file already holds every byte the server has.
+                        if self._content_range_total(response) == offset == part_meta.get("total"):
+                            self._finish_part(part_path, file_path)
+                            return True
+                        logger.warning(f"Discarding unusable partial download: {part_path}")
+                        self._discard_part(part_path)
+                        continue
+
+                    if response.status_code in (200, 206):
+                        started = time.monotonic()
+                        expected = self._write_part(response, part_path, offset, part_meta, stream_paths)
+                        limiter.on_success()
+                        received = os.path.getsize(part_path)
+                        host_stats.record(url, received - offset, time.monotonic() - started)
+                        if expected is None or received == expected:
+                            self._finish_part(part_path, file_path)
+                            return True
+                        logger.warning(
+                            f"Download incomplete ({received}/{expected} bytes), "
+                            f"retry {attempt + 1}/{attempts}"
+                        )
+                        continue
 
+                    if response.status_code in THROTTLE_STATUS_CODES:
+                        limiter.on_throttled()
+                    host_stats.record_failure(url)
+                    logger.warning(
+                        f"Download failed ({response.status_code}) from {host_of(url)}, "
+                        f"retry {attempt + 1}/{attempts}"
+                    )
+            except (requests.exceptions.RequestException, OSError, _StreamStalled) as e:
+                host_stats.record_failure(url)
                 logger.warning(
-                    f"Download failed ({response.status_code}), "
-                    f"retry {retry + 1}/{DownloadConfig.MAX_RETRIES}"
+                    f"Download from {host_of(url)} failed: {e}, "
+                    f"retry {attempt + 1}/{attempts}"
                 )
-            except requests.exceptions.RequestException as e:
+
+        return False
+
+    def _segmented_size(self, url: str, headers: dict) -> Optional[int]:
+        """Return the stream size when it is large enough to fetch in segments.
+
+        Asks for the first byte only; a server that answers 206 with the
+        total length honours ranges. Any failure just means no segmenting.
+        """
+        threshold = settings.segment_threshold_mb * 1024 * 1024
+        if not threshold or settings.segment_connections < 2:
+            return None
+        get_rate_limiter(rate_limiter.STREAM).acquire()
+        try:
+            with get_session().get(
+                url,
+                headers={**headers, "Range": "bytes=0-0"},
+                timeout=(DownloadConfig.NETWORK_TIMEOUT, DownloadConfig.STALL_TIMEOUT),
+                stream=True,
+            ) as response:
+                if response.status_code != 206 or self._content_range_start(response) != 0:
+                    return None
+                total = self._content_range_total(response)
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"Range probe failed ({host_of(url)}): {e}")
+            return None
+        return total if total and total >= threshold else None
+
+    def _download_segmented(
+        self, urls: List[str], headers: dict, file_path: str, total: int
+    ) -> bool:
+        """Fetch byte ranges of one stream over parallel connections.
+
+        Segments are written at their offsets into a preallocated
+        ``<file_path>.seg.part``; a file with holes cannot be resumed by size,
+        so it never shares the name of the sequential part file.
+        """
+        seg_path = f"{file_path}.seg.part"
+        segment_size = math.ceil(total / settings.segment_connections)
+        ranges = [
+            (start, min(start + segment_size, total) - 1)
+            for start in range(0, total, segment_size)
+        ]
+        logger.info(
+            f"Downloading {total / 1024 / 1024:.1f} MB in {len(ranges)} segments: "
+            f"{os.path.basename(file_path)}"
+        )
+        failed = threading.Event()
+        try:
+            with open(seg_path, "wb") as audio_file:
+                audio_file.truncate(total)
+            with ThreadPoolExecutor(
+                max_workers=len(ranges), thread_name_prefix="segment"
+            ) as executor:
+                written = list(executor.map(
+                    lambda bounds: self._download_segment(urls, headers, seg_path, *bounds, failed),
+                    ranges,
+                ))
+            # The file is preallocated, so its size proves nothing; every
+            # segment must report its full byte count.
+            completed = all(count == end - start + 1 for count, (start, end) in zip(written, ranges))
+            if completed:
+                os.replace(seg_path, file_path)
+                return True
+            logger.warning(f"Segmented download incomplete: {os.path.basename(file_path)}")
+        except OSError as e:
+            logger.warning(f"Segmented download failed: {e}")
+        if os.path.exists(seg_path):
+            os.remove(seg_path)
+        return False
+
+    def _download_segment(
+        self,
+        urls: List[str],
+        headers: dict,
+        seg_path: str,
+        start: int,
+        end: int,
+        failed: threading.Event,
+    ) -> int:
+        """Download bytes ``start..end`` (inclusive), resuming within the segment.
+
+        Each retry moves on to the next mirror. Returns the number of bytes
+        written, which is short of the segment length on failure.
+        """
+        limiter = get_rate_limiter(rate_limiter.STREAM)
+        host_stats = get_host_stats()
+        position = start
+        attempts = DownloadConfig.MAX_RETRIES + len(urls) - 1
+        for attempt in range(attempts):
+            if failed.is_set():
+                return position - start
+            url = urls[attempt % len(urls)]
+            limiter.acquire()
+            try:
+                with get_session().get(
+                    url,
+                    headers={**headers, "Range": f"bytes={position}-{end}"},
+                    timeout=(DownloadConfig.NETWORK_TIMEOUT, DownloadConfig.STALL_TIMEOUT),
+                    stream=True,
+                ) as response:
+                    if response.status_code != 206 or self._content_range_start(response) != position:
+                        if response.status_code in THROTTLE_STATUS_CODES:
+                            limiter.on_throttled()
+                        host_stats.record_failure(url)
+                        logger.warning(
+                            f"Segment {start}-{end} failed ({response.status_code}) from "
+                            f"{host_of(url)}, retry {attempt + 1}/{attempts}"
+                        )
+                        continue
+                    started = time.monotonic()
+                    with open(seg_path, "r+b") as audio_file:
+                        audio_file.seek(position)
+                        position += self._copy_stream(
+                            response, audio_file, end + 1 - position, failed
+                        )
+                    limiter.on_success()
+                    host_stats.record(url, position - start, time.monotonic() - started)
+                if position > end:
+                    return position - start
+            except (requests.exceptions.RequestException, OSError, _StreamStalled) as e:
+                host_stats.record_failure(url)
                 logger.warning(
-                    f"Download request failed: {e}, "
-                    f"retry {retry + 1}/{DownloadConfig.MAX_RETRIES}"
+                    f"Segment {start}-{end} from {host_of(url)} failed: {e}, "
+                    f"retry {attempt + 1}/{attempts}"
                 )
-            time.sleep(1)
+        failed.set()
+        return position - start
 
-        return False
+    def _write_part(
+        self,
+        response: requests.Response,
+        part_path: str,
+        offset: int,
+        part_meta: Optional[Dict[str, Any]],
+        stream_paths: List[str],
+    ) -> Optional[int]:
+        """Append a 206 body to the part file (or rewrite it for a 200).
+
+        A 206 must continue the stream recorded in ``part_meta``: same start
+        offset, same total length and, when both sides have one, same ETag.
+        Returns the expected size of the complete file, or None when the
+        server did not say.
+        """
+        if response.status_code == 206:
+            total = self._content_range_total(response)
+            start = self._content_range_start(response)
+            if start != offset:
+                self._discard_part(part_path)
+                raise OSError(f"server resumed at byte {start}, expected {offset}")
+            etag = response.headers.get("ETag")
+            if total != part_meta.get("total") or (etag and part_meta.get("etag") and etag != part_meta["etag"]):
+                self._discard_part(part_path)
+                raise OSError("stream changed since the partial download started")
+            mode = "ab"
+        else:
+            # Range ignored, validator mismatch (or nothing to resume): start over.
+            length = response.headers.get("Content-Length")
+            total = int(length) if length and length.isdigit() else None
+            mode = "wb"
+            self._save_part_meta(part_path, {
+                "paths": stream_paths,
+                "total": total,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            })
+
+        with open(part_path, mode) as audio_file:
+            self._copy_stream(response, audio_file)
+        return total
+
+    @staticmethod
+    def _load_part_meta(part_path: str) -> Optional[Dict[str, Any]]:
+        """Read the record of which stream a part file holds, if any."""
+        try:
+            with open(f"{part_path}.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if isinstance(meta, dict) else None
+
+    @staticmethod
+    def _save_part_meta(part_path: str, meta: Dict[str, Any]) -> None:
+        with open(f"{part_path}.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    @staticmethod
+    def _discard_part(part_path: str) -> None:
+        """Remove a part file and its stream record."""
+        for path in (part_path, f"{part_path}.json"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _finish_part(part_path: str, file_path: str) -> None:
+        """Move a complete part file into place and drop its stream record."""
+        os.replace(part_path, file_path)
+        if os.path.exists(f"{part_path}.json"):
+            os.remove(f"{part_path}.json")
+
+    @staticmethod
+    def _copy_stream(
+        response: requests.Response,
+        audio_file,
+        limit: Optional[int] = None,
+        cancelled: Optional[threading.Event] = None,
+    ) -> int:
+        """Copy a response body to ``audio_file``; return the number of bytes written.
+
+        Raises ``_StreamStalled`` when fewer than ``STALL_MIN_BYTES`` arrive
+        within ``STALL_TIMEOUT`` seconds, so the caller can switch mirrors
+        instead of trickling along on a slow node.
+        """
+        written = 0
+        window_start = time.monotonic()
+        window_bytes = 0
+        for chunk in response.iter_content(chunk_size=65536):
+            if limit is not None:
+                chunk = chunk[:limit - written]
+            audio_file.write(chunk)
+            written += len(chunk)
+            window_bytes += len(chunk)
+            if (limit is not None and written >= limit) or (cancelled and cancelled.is_set()):
+                break
+            elapsed = time.monotonic() - window_start
+            if elapsed >= DownloadConfig.STALL_TIMEOUT:
+                if window_bytes < DownloadConfig.STALL_MIN_BYTES:
+                    raise _StreamStalled(
+                        f"only {window_bytes} bytes in {elapsed:.0f}s from {host_of(response.url)}"
+                    )
+                window_start, window_bytes = time.monotonic(), 0
+        return written
+
+    @staticmethod
+    def _content_range_start(response: requests.Response) -> Optional[int]:
+        """Parse the first byte position from ``Content-Range: bytes a-b/total``."""
+        match = re.match(r"bytes (\d+)-", response.headers.get("Content-Range", ""))
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def _content_range_total(response: requests.Response) -> Optional[int]:
+        """Parse the complete length from ``Content-Range: bytes .../total``."""
+        match = re.search(r"/(\d+)$", response.headers.get("Content-Range", ""))
+        return int(match.group(1)) if match else None
@@ -2,18 +2,22 @@
 
 import os
 import logging
-from typing import List, Optional, Tuple, Dict, Any, Callable
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple, Dict, Any, Callable, Iterable, Sized
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 
-from ..config import settings
-from ..utils import get_logger, convert_m3u_to_txt
-from ..utils.cache import DownloadCache
+from ..config import settings, DownloadConfig
+from ..utils import get_logger, write_playlists
+from ..utils.favorite_state import FavoriteStateStore
+from ..utils.playlist import format_playlist_name, merge_tracks, read_m3u, sanitize_filename
 from .api_client import FavoriteAPIClient
 from .parser import PageParser
 from .navigator import PageNavigator
-from .audio import AudioDownloader
+from .scheduler import DownloadScheduler
 
 logger = get_logger(__name__)
 
@@ -169,6 +173,85 @@ class BilibiliDownloader:
         
         return video_list, favorite_title
     
+    def stream_bv_from_favorite(
+        self,
+        favorite_url: str,
+        cookie: Optional[str] = None,
+        incremental: Optional[bool] = None,
+    ) -> Tuple[Iterable[Dict[str, Any]], Optional[str], int]:
+        """
+        流式获取收藏夹视频：第一页返回后即可开始下载，其余分页在后台获取
+
+        增量模式下，已同步过的收藏夹只获取新增部分，其余沿用上次记录；
+        API 方式无法使用时回退到 get_bv_from_favorite（完整列表）。
+
+        Args:
+            favorite_url: 收藏夹 URL
+            cookie: Cookie 字符串（可选）
+            incremental: 是否增量同步，None 则使用配置中的 incremental_sync
+
+        Returns:
+            (视频信息迭代器, 收藏夹标题, 视频总数)
+        """
+        media_id = FavoriteAPIClient.parse_media_id(favorite_url)
+        if media_id:
+            try:
+                streamed = self._stream_favorite_api(media_id, cookie, incremental)
+                if streamed:
+                    return streamed
+            except Exception as e:
+                logger.error(f"API 流式获取失败: {e}，回退到完整列表方式")
+
+        video_list, favorite_title = self.get_bv_from_favorite(favorite_url, cookie)
+        return video_list, favorite_title, len(video_list)
+
+    def _stream_favorite_api(
+        self,
+        media_id: str,
+        cookie: Optional[str] = None,
+        incremental: Optional[bool] = None,
+    ) -> Optional[Tuple[Iterable[Dict[str, Any]], Optional[str], int]]:
+        """使用 API 流式（或增量）获取收藏夹，第一页获取失败时返回 None"""
+        if incremental is None:
+            incremental = settings.incremental_sync
+        api_client = FavoriteAPIClient(cookie)
+        state_store = FavoriteStateStore()
+        previous = state_store.load(media_id) if incremental else None
+        if previous and previous.get("videos"):
+            delta = api_client.get_favorite_delta(
+                media_id, previous["videos"], previous.get("media_count") or 0
+            )
+            if delta is not None:
+                video_list, favorite_title, media_count = delta
+                state_store.save(media_id, favorite_title, media_count, video_list)
+                logger.info(f"=== API 增量获取收藏夹: {favorite_title}，共 {media_count} 个视频 ===")
+                return video_list, favorite_title, len(video_list)
+
+        videos, favorite_title, total = api_client.stream_favorite_videos(media_id)
+        if not (favorite_title or total):
+            return None
+        logger.info(f"=== API 流式获取收藏夹: {favorite_title}，共 {total} 个视频 ===")
+        return (
+            self._record_favorite_state(state_store, media_id, favorite_title, total, videos),
+            favorite_title,
+            total,
+        )
+
+    @staticmethod
+    def _record_favorite_state(
+        state_store: FavoriteStateStore,
+        media_id: str,
+        favorite_title: Optional[str],
+        media_count: int,
+        videos: Iterable[Dict[str, Any]],
+    ) -> Iterable[Dict[str, Any]]:
+        """透传视频迭代器，完整枚举结束后保存同步状态（中途失败或提前结束则不保存）"""
+        video_list: List[Dict[str, Any]] = []
+        for video_info in videos:
+            video_list.append(video_info)
+            yield video_info
+        state_store.save(media_id, favorite_title, media_count, video_list)
+
     def _get_bv_from_favorite_api(
         self, 
         favorite_url: str, 
@@ -232,6 +315,118 @@ class BilibiliDownloader:
         logger.info(f"=== Selenium 方式扫描完成，总共找到 {len(video_list)} 个视频 ===")
         return video_list, favorite_title
     
+    @staticmethod
+    def favorite_paths(save_root: str, favorite_title: str) -> Tuple[str, str]:
+        """
+        收藏夹的下载目录与播放列表路径：以收藏夹名称作为子文件夹
+
+        Returns:
+            (下载目录, M3U 播放列表路径)
+        """
+        download_path = os.path.join(save_root, favorite_title)
+        if settings.flag_replace_invalid_filename_chars:
+            # 使用格式化后的收藏夹名称作为播放列表文件名
+            m3u_filename = format_playlist_name(favorite_title)
+        else:
+            m3u_filename = favorite_title
+        return download_path, os.path.join(download_path, f"{m3u_filename}.m3u")
+
+    def sync_user_favorites(
+        self,
+        user_id: str,
+        save_root: str,
+        cookie: Optional[str] = None,
+        progress_callback: Optional[Callable] = None,
+        max_workers: Optional[int] = None,
+        incremental: Optional[bool] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        同步用户的所有收藏夹：各收藏夹并行获取列表，共用同一个下载调度器
+
+        同一 BV 号出现在多个收藏夹时只下载一次：启用内容存储时音频保存在 .store 中，
+        各收藏夹目录中放置硬链接；否则保存在最先提交它的收藏夹目录下。
+        每个收藏夹仍各自生成播放列表。只使用 API 方式，某个收藏夹获取失败时跳过该收藏夹。
+
+        Args:
+            user_id: B站用户 UID
+            save_root: 保存根目录，每个收藏夹一个子文件夹
+            cookie: Cookie 字符串（同步私密收藏夹时需要）
+            progress_callback: 进度回调函数 (current, total, message)，所有收藏夹合计
+            max_workers: 并发下载数，None 则使用配置中的 download_workers
+            incremental: 是否增量同步，None 则使用配置中的 incremental_sync
+
+        Returns:
+            已同步的收藏夹列表，每项为 {'id', 'title', 'total', 'm3u_path'}
+        """
+        favorites = self.get_user_all_favorites(user_id, cookie)
+        if not favorites:
+            logger.warning(f"用户 {user_id} 没有可同步的收藏夹")
+            return []
+
+        logger.info(f"=== 开始同步用户 {user_id} 的 {len(favorites)} 个收藏夹 ===")
+        progress_lock = threading.Lock()
+        progress = {"current": 0, "total": sum(f.get("media_count") or 0 for f in favorites)}
+
+        def folder_progress() -> Callable:
+            # 每个收藏夹的进度单调递增，只把增量累加到账号总进度
+            last = 0
+
+            def report(current: int, total: int, message: str) -> None:
+                nonlocal last
+                with progress_lock:
+                    progress["current"] += max(0, current - last)
+                    last = max(last, current)
+                    if progress_callback:
+                        progress_callback(
+                            min(progress["current"], progress["total"]),
+                            progress["total"],
+                            message,
+                        )
+            return report
+
+        def sync_folder(favorite: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            media_id = str(favorite.get("id"))
+            try:
+                streamed = self._stream_favorite_api(media_id, cookie, incremental)
+            except Exception as e:
+                logger.error(f"获取收藏夹 {favorite.get('title')} ({media_id}) 失败，跳过: {e}")
+                return None
+            if not streamed:
+                logger.warning(f"收藏夹 {favorite.get('title')} ({media_id}) 为空或无法访问，跳过")
+                return None
+            videos, favorite_title, total = streamed
+            favorite_title = favorite_title or sanitize_filename(str(favorite.get("title") or media_id))
+            download_path, m3u_path = self.favorite_paths(save_root, favorite_title)
+            try:
+                # 后续分页在下载过程中才获取，失败时同样只跳过该收藏夹
+                self.download_audio_list(
+                    videos,
+                    download_path,
+                    m3u_path,
+                    cookie,
+                    folder_progress(),
+                    album=favorite_title,
+                    total=total,
+                    scheduler=scheduler,
+                )
+            except Exception as e:
+                logger.error(f"同步收藏夹 {favorite_title} ({media_id}) 失败，跳过: {e}")
+                return None
+            return {"id": media_id, "title": favorite_title, "total": total, "m3u_path": m3u_path}
+
+        synced: List[Dict[str, Any]] = []
+        with DownloadScheduler(cookie, max_workers) as scheduler:
+            folder_workers = min(len(favorites), DownloadConfig.FAVORITE_SYNC_WORKERS)
+            with ThreadPoolExecutor(max_workers=folder_workers, thread_name_prefix="favorite") as executor:
+                for result in executor.map(sync_folder, favorites):
+                    if result:
+                        synced.append(result)
+
+        logger.info(f"=== 账号同步完成：{len(synced)}/{len(favorites)} 个收藏夹 ===")
+        if progress_callback:
+            progress_callback(progress["total"], progress["total"], "同步完成！播放列表已生成。")
+        return synced
+
     def download_favorite_audio(
         self, 
         favorite_url: str, 
@@ -254,109 +449,119 @@ class BilibiliDownloader:
             视频信息列表
         """
         logger.info("=== 开始一键获取收藏夹并下载音频 ===")
-        video_list, _ = self.get_bv_from_favorite(
-            favorite_url=favorite_url,
-            cookie=cookie,
-            auto_download=True,
-            save_path=save_path,
-            m3u_path=m3u_path,
-            progress_callback=progress_callback
-        )
+        videos, favorite_title, total = self.stream_bv_from_favorite(favorite_url, cookie)
+        video_list: List[Dict[str, Any]] = []
+
+        def record():
+            for video_info in videos:
+                video_list.append(video_info)
+                yield video_info
+
+        try:
+            self.download_audio_list(
+                record(),
+                save_path,
+                m3u_path,
+                cookie,
+                progress_callback,
+                album=favorite_title,
+                total=total,
+            )
+            logger.info("=== 自动下载完成 ===")
+        except Exception as e:
+            logger.error(f"自动下载失败: {e}")
         return video_list
     
     def download_audio_list(
         self, 
-        video_list: List[Dict[str, str]], 
+        video_list: Iterable[Dict[str, Any]], 
         save_path: str, 
         m3u_path: str,
         cookie: Optional[str] = None, 
         progress_callback: Optional[Callable] = None,
         album: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        total: Optional[int] = None,
+        scheduler: Optional[DownloadScheduler] = None,
     ) -> None:
         """
-        批量下载音频并生成播放列表
+        批量并发下载音频并按收藏夹顺序生成播放列表
+
+        video_list 可以是列表，也可以是 stream_favorite_videos 返回的迭代器：
+        每取到一个视频就立即提交下载，不必等待整个收藏夹枚举完成。
         
         Args:
-            video_list: 视频信息列表，每个元素包含 {'bvid': str, 'title': str}
+            video_list: 视频信息列表或迭代器，每个元素包含 {'bvid': str, 'title': str}
             save_path: 保存路径
             m3u_path: M3U 播放列表路径
             cookie: Cookie 字符串
             progress_callback: 进度回调函数 (current, total, message)
+            album: 专辑名（收藏夹标题）
+            max_workers: 并发下载数，None 则使用配置中的 download_workers
+            total: 视频总数（用于进度显示），None 则取 len(video_list)
+            scheduler: 共用的下载调度器（由调用方负责关闭），None 则新建
         """
-        logger.info(f"开始下载音频列表，共 {len(video_list)} 个视频")
+        if total is None:
+            total = len(video_list) if isinstance(video_list, Sized) else 0
+        logger.info(f"开始下载音频列表，共 {total} 个视频")
         logger.info(f"保存路径: {save_path}")
         
         os.makedirs(save_path, exist_ok=True)
-        m3u_entries = ["#EXTM3U"]
-        
-        # 加载下载缓存
-        cache = DownloadCache()
 
-        # 使用 API 方式下载，无需浏览器
-        audio_downloader = AudioDownloader(cookie)
+        results: List[Optional[Dict[str, Any]]] = []
+        done_queue: "queue.Queue[Tuple[int, Future]]" = queue.Queue()
+        pending = 0
+        completed = 0
 
-        total = len(video_list)
-        for index, video_info in enumerate(video_list, 1):
-            bv_number = video_info.get('bvid')
-            title = video_info.get('title', bv_number)  # Fallback to bvid if title is missing
-            invalid = video_info.get('invalid', False)
-            
-            if not bv_number:
-                logger.warning(f"第 {index}/{total} 个视频信息无效，跳过: {video_info}")
-                continue
-
-            # 先查缓存，本地文件存在则跳过下载
-            cached = cache.lookup(bv_number)
-            if cached:
-                cached_path, cached_title = cached
-                local_title = os.path.splitext(os.path.basename(cached_path))[0]
-                display_title = local_title if invalid else (title or cached_title or bv_number)
-                logger.info(f"[缓存命中] 跳过已下载: {display_title}")
-                audio_downloader.ensure_metadata(
-                    file_path=cached_path,
-                    title=display_title,
-                    artist=video_info.get('artist'),
-                    album=album,
-                    cover_url=video_info.get('cover_url'),
-                    bv_number=None if invalid else bv_number,
-                )
-                abs_path = os.path.abspath(cached_path).replace("\\", "/")
-                m3u_entries.append(f"#EXTINF:0,{display_title}")
-                m3u_entries.append(abs_path)
-                if progress_callback:
-                    progress_callback(index, total, f"已存在: {display_title}")
-                continue
-            
-            logger.info(f"正在处理第 {index}/{total} 个视频: {title or bv_number}")
-            
+        def report(index: int, future: Future) -> None:
+            # 进度只在当前线程上报，保证计数单调递增
+            nonlocal completed
+            result = future.result()
+            results[index] = result
+            completed += 1
             if progress_callback:
-                progress_callback(index, total, f"正在处理: {title or bv_number}")
-            
-            # 下载音频
-            result = audio_downloader.download_audio(
-                bv_number=bv_number,
-                save_path=save_path,
-                title=title,
-                album=album,
-            )
-            
-            if result:
-                downloaded_title, file_path, duration = result
-                # 写入缓存
-                cache.add(bv_number, downloaded_title, file_path)
-                # 添加到播放列表
-                abs_path = os.path.abspath(file_path).replace("\\", "/")
-                m3u_entries.append(f"#EXTINF:{duration},{downloaded_title}")
-                m3u_entries.append(abs_path)
-                
-                if progress_callback:
-                    progress_callback(index, total, f"完成: {downloaded_title}")
-            else:
-                if progress_callback:
-                    progress_callback(index, total, f"跳过: {title or bv_number}")
-        
-        # 生成播放列表
-        self._save_playlists(m3u_entries, m3u_path)
+                progress_callback(completed, max(total, len(results)), result["message"])
+
+        own_scheduler = scheduler is None
+        if own_scheduler:
+            scheduler = DownloadScheduler(cookie, max_workers)
+        try:
+            logger.info(f"使用 {scheduler.max_workers} 个线程并发下载")
+            for index, video_info in enumerate(video_list):
+                results.append(None)
+                if not video_info.get('bvid'):
+                    logger.warning(f"第 {index + 1} 个视频信息无效，跳过: {video_info}")
+                    completed += 1
+                    continue
+                future = scheduler.submit(video_info, save_path, album)
+                future.add_done_callback(lambda f, i=index: done_queue.put((i, f)))
+                pending += 1
+
+                # 边枚举边上报已完成的任务
+                while not done_queue.empty():
+                    report(*done_queue.get())
+                    pending -= 1
+
+            total = len(results)
+            while pending:
+                report(*done_queue.get())
+                pending -= 1
+        finally:
+            if own_scheduler:
+                scheduler.shutdown()
+
+        # 按原始顺序生成播放列表
+        tracks = [
+            {
+                "title": result["title"],
+                "path": os.path.abspath(result["file_path"]).replace("\\", "/"),
+                "duration": result["duration"],
+            }
+            for result in results
+            if result and result["file_path"]
+        ]
+
+        self._save_playlists(tracks, m3u_path)
         
         logger.info("所有下载任务完成")
         if progress_callback:
@@ -402,19 +607,27 @@ class BilibiliDownloader:
         else:
             logger.warning("没有找到任何视频信息")
     
-    def _save_playlists(self, m3u_entries: List[str], m3u_path: str):
-        """保存播放列表文件"""
-        logger.info("生成 M3U 播放列表...")
-        with open(m3u_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(m3u_entries))
-        
-        # 转换为 TS Bot 格式
-        list_path = os.path.join(
-            settings.ts_playlist_path, 
-            os.path.splitext(os.path.basename(m3u_path))[0]
-        )
-        logger.info(f"转换 M3U 到播放列表: {list_path}")
-        convert_m3u_to_txt(m3u_path, list_path)
+    def _save_playlists(self, tracks: List[Dict[str, Any]], m3u_path: str):
+        """
+        一次生成 M3U 与 TS Bot 格式的播放列表
+
+        以上次生成的 M3U 为基础增量更新：按配置的排序方式合并新增与移除的曲目，
+        内容没有变化的文件不重写。
+        """
+        list_title = os.path.splitext(os.path.basename(m3u_path))[0]
+        list_path = os.path.join(settings.ts_playlist_path, list_title)
+        previous = []
+        if os.path.exists(m3u_path):
+            try:
+                previous = read_m3u(m3u_path)
+            except (OSError, UnicodeDecodeError) as e:
+                logger.warning(f"读取已有播放列表失败，将重新生成 ({m3u_path}): {e}")
+        tracks = merge_tracks(tracks, previous, settings.playlist_order)
+        written = write_playlists(tracks, {"m3u": m3u_path, "tsbot": list_path}, list_title)
+        if written:
+            logger.info(f"已更新播放列表: {', '.join(written)}")
+        else:
+            logger.info(f"播放列表没有变化: {list_title}")
     
     def close(self):
         """关闭浏览器"""
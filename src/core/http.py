@@ -0,0 +1,102 @@
+"""共享 HTTP 会话：所有 API 与音频流请求复用同一组连接池"""
+
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config import settings
+from ..utils import get_logger
+from .rate_limiter import THROTTLE_API_CODES, THROTTLE_STATUS_CODES, get_rate_limiter
+from .retry import APIError, RetryPolicy
+
+logger = get_logger(__name__)
+
+# 缓存的主机连接池数量（api.bilibili.com、i0.hdslb.com 以及若干 upos 节点）
+POOL_HOSTS = 16
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _default_pool_size() -> int:
+    """
+    每个主机的连接数：每个下载线程最多占 segment_connections 个连接（分段下载），
+    另外预留收藏夹分页并发所需的连接
+    """
+    return settings.download_workers * settings.segment_connections + 4
+
+
+def _create_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    # 各客户端通过请求头显式携带 Cookie，不让响应中的 Set-Cookie 在线程间串用
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    logger.debug(f"创建共享 HTTP 会话，每主机连接池大小: {pool_size}")
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    获取进程内共享的 HTTP 会话（线程安全，连接保持复用）
+
+    Returns:
+        requests.Session 实例
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session(_default_pool_size())
+    return _session
+
+
+def get_api_data(
+    url: str,
+    family: str,
+    headers: Optional[Dict[str, str]] = None,
+    policy: Optional[RetryPolicy] = None,
+) -> Any:
+    """
+    经过接口族限速器与重试策略发起 API 请求，返回响应中的 data 字段
+
+    被风控（HTTP 412/429 或业务码 -352）时通知限速器降速；超时、5xx 与风控按
+    重试策略退避重试，无效视频等不可重试的失败立即抛出。
+
+    Args:
+        url: 请求地址
+        family: 接口族名称（见 rate_limiter）
+        headers: 请求头
+        policy: 重试策略，None 则使用默认策略（次数与超时取自配置）
+
+    Returns:
+        业务码为 0 时响应中的 data 字段
+
+    Raises:
+        APIError: 业务码非 0（重试耗尽或不可重试）
+        requests.RequestException: 网络异常或非 2xx 响应（重试耗尽或不可重试）
+    """
+    policy = policy or RetryPolicy()
+    limiter = get_rate_limiter(family)
+
+    def attempt() -> Any:
+        limiter.acquire()
+        response = get_session().get(url, headers=headers, timeout=policy.timeout)
+        if response.status_code in THROTTLE_STATUS_CODES:
+            limiter.on_throttled()
+        response.raise_for_status()
+        payload = response.json()
+        code = payload.get("code")
+        if code in THROTTLE_API_CODES:
+            limiter.on_throttled()
+        else:
+            limiter.on_success()
+        if code != 0:
+            raise APIError(code, payload.get("message", ""))
+        return payload.get("data")
+
+    return policy.call(attempt, description=url)
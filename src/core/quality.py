@@ -0,0 +1,92 @@
+"""音频流质量策略：按码率上下限与偏好的音质 ID 从 playurl 返回的 DASH 音频中选流"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..config import settings
+from ..utils import get_logger
+
+logger = get_logger(__name__)
+
+# playurl 的 fnval 标志位：16 = DASH，256 = 杜比音频；4048 包含所有 DASH 扩展（含 Hi-Res 无损）
+FNVAL_DASH = 16
+FNVAL_ALL = 4048
+
+# 常见音质 ID：30216 = 64K，30232 = 132K，30280 = 192K，30250 = 杜比全景声，30251 = Hi-Res 无损
+LOSSLESS_AUDIO_IDS = frozenset({30250, 30251})
+
+
+class AudioQualityPolicy:
+    """音频流选择策略，未指定的参数取自 Settings"""
+
+    def __init__(
+        self,
+        max_kbps: Optional[int] = None,
+        min_kbps: Optional[int] = None,
+        preferred_ids: Optional[Sequence[int]] = None,
+        include_lossless: Optional[bool] = None,
+    ):
+        """
+        初始化质量策略
+
+        Args:
+            max_kbps: 码率上限（kbps），0 表示不限制
+            min_kbps: 大于 0 时选择不低于该码率的最小音频流，而不是最高码率
+            preferred_ids: 按优先顺序排列的音质 ID，满足码率上限时优先选用
+            include_lossless: 是否考虑杜比与 Hi-Res 无损音频
+        """
+        self.max_kbps = settings.max_audio_kbps if max_kbps is None else max_kbps
+        self.min_kbps = settings.min_audio_kbps if min_kbps is None else min_kbps
+        self.preferred_ids = list(
+            settings.preferred_audio_ids if preferred_ids is None else preferred_ids
+        )
+        self.include_lossless = (
+            settings.include_lossless if include_lossless is None else include_lossless
+        )
+
+    @property
+    def fnval(self) -> int:
+        """请求 playurl 时使用的 fnval：不需要无损音频时只请求普通 DASH"""
+        return FNVAL_ALL if self.include_lossless else FNVAL_DASH
+
+    def candidates(self, dash_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """列出策略允许的所有音频流"""
+        streams = list(dash_data.get("audio") or [])
+        if self.include_lossless:
+            streams += (dash_data.get("dolby") or {}).get("audio") or []
+            flac_audio = (dash_data.get("flac") or {}).get("audio")
+            if flac_audio:
+                streams.append(flac_audio)
+        else:
+            streams = [s for s in streams if s.get("id") not in LOSSLESS_AUDIO_IDS]
+        return [s for s in streams if s.get("baseUrl") or s.get("base_url")]
+
+    def select(self, dash_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        按策略选出一条音频流
+
+        Returns:
+            音频流字典，没有可用音频时返回 None
+        """
+        streams = self.candidates(dash_data)
+        if not streams:
+            return None
+
+        def bandwidth(stream: Dict[str, Any]) -> int:
+            return stream.get("bandwidth", 0)
+
+        if self.max_kbps:
+            capped = [s for s in streams if bandwidth(s) <= self.max_kbps * 1000]
+            # 没有满足上限的流时退而取最小的一条
+            streams = capped or [min(streams, key=bandwidth)]
+
+        for audio_id in self.preferred_ids:
+            preferred = [s for s in streams if s.get("id") == audio_id]
+            if preferred:
+                return max(preferred, key=bandwidth)
+
+        if self.min_kbps:
+            sufficient = [s for s in streams if bandwidth(s) >= self.min_kbps * 1000]
+            if sufficient:
+                return min(sufficient, key=bandwidth)
+
+        return max(streams, key=bandwidth)
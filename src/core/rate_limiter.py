@@ -0,0 +1,128 @@
+"""自适应限速器：按接口族共享的令牌桶，遇到风控时乘性降速，成功后加性恢复（AIMD）"""
+
+import asyncio
+import threading
+import time
+from typing import Dict
+
+from ..config import DownloadConfig
+from ..utils import get_logger
+
+logger = get_logger(__name__)
+
+# 接口族名称
+FAVORITE = "favorite"
+VIDEO_INFO = "video"
+PLAY_URL = "playurl"
+STREAM = "stream"
+
+# 触发降速的 HTTP 状态码与 B 站业务码
+THROTTLE_STATUS_CODES = (412, 429)
+THROTTLE_API_CODES = (-352, -412)
+
+
+class AdaptiveRateLimiter:
+    """令牌桶限速器（线程安全，同时支持同步与异步等待）"""
+
+    # 被风控时速率乘以该系数
+    BACKOFF_FACTOR = 0.5
+    # 全速运行时每秒大约提升的速率（请求/秒）
+    INCREASE_STEP = 0.5
+    # 并发请求同时被风控时，该时间窗内只降速一次
+    DECREASE_COOLDOWN = 1.0
+    # 被风控后暂停发送的时间上限（秒），连续风控时按 2 的幂增长
+    MAX_PAUSE = 60.0
+
+    def __init__(self, name: str, rate: float, min_rate: float, max_rate: float):
+        """
+        初始化限速器
+
+        Args:
+            name: 接口族名称（用于日志）
+            rate: 初始速率（请求/秒）
+            min_rate: 降速下限
+            max_rate: 提速上限
+        """
+        self.name = name
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._capacity = 1.0
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        预订一个令牌
+
+        Returns:
+            调用方在发出请求前需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self) -> None:
+        """阻塞等待直到可以发出请求"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """在事件循环中等待直到可以发出请求"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self) -> None:
+        """请求成功：加性提速"""
+        with self._lock:
+            self._consecutive_throttles = 0
+            self.rate = min(self.max_rate, self.rate + self.INCREASE_STEP / self.rate)
+
+    def on_throttled(self) -> None:
+        """请求被风控（-352 / HTTP 412 / 429）：乘性降速并短暂暂停"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease < self.DECREASE_COOLDOWN:
+                return
+            self._last_decrease = now
+            self._consecutive_throttles += 1
+            self.rate = max(self.min_rate, self.rate * self.BACKOFF_FACTOR)
+            pause = min(self.MAX_PAUSE, 2.0 ** self._consecutive_throttles)
+            self._paused_until = now + pause
+            self._tokens = min(self._tokens, 0.0)
+            logger.warning(
+                f"[{self.name}] 触发风控，速率降至 {self.rate:.2f} 次/秒，暂停 {pause:.0f} 秒"
+            )
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(family: str) -> AdaptiveRateLimiter:
+    """
+    获取进程内共享的接口族限速器
+
+    Args:
+        family: 接口族名称，参数见 DownloadConfig.RATE_LIMITS
+
+    Returns:
+        AdaptiveRateLimiter 实例
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(family)
+        if limiter is None:
+            rate, min_rate, max_rate = DownloadConfig.RATE_LIMITS[family]
+            limiter = AdaptiveRateLimiter(family, rate, min_rate, max_rate)
+            _limiters[family] = limiter
+        return limiter
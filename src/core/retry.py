@@ -0,0 +1,121 @@
+"""API 请求重试策略：指数退避 + 随机抖动，区分可重试与不可重试的失败"""
+
+import asyncio
+import random
+import time
+from typing import Callable, Optional, TypeVar
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖
+    aiohttp = None
+
+from ..config import settings
+from ..utils import get_logger
+from .rate_limiter import THROTTLE_API_CODES, THROTTLE_STATUS_CODES
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# 服务端临时故障，值得重试的业务码（风控、服务繁忙、超时等）
+RETRYABLE_API_CODES = frozenset(THROTTLE_API_CODES) | {-500, -503, -504, -509, -799}
+
+
+class APIError(Exception):
+    """B 站接口返回非 0 业务码"""
+
+    def __init__(self, code: int, message: str = ""):
+        super().__init__(f"{message or '未知错误'} (code={code})")
+        self.code = code
+        self.message = message
+
+    @property
+    def retryable(self) -> bool:
+        """-404、62002（稿件不可见）等表示视频已删除或无效，重试没有意义"""
+        return self.code in RETRYABLE_API_CODES
+
+
+class RetryPolicy:
+    """指数退避重试策略，次数与超时默认取自 Settings"""
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+    ):
+        """
+        初始化重试策略
+
+        Args:
+            max_retries: 失败后的最大重试次数，None 则使用 settings.max_retries
+            timeout: 单次请求超时（秒），None 则使用 settings.network_timeout
+            base_delay: 第一次重试前的基础等待时间（秒）
+            max_delay: 单次等待时间上限（秒）
+        """
+        self.max_retries = settings.max_retries if max_retries is None else max_retries
+        self.timeout = timeout or settings.network_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次（从 0 开始）失败后的等待时间，使用 full jitter 避免并发请求同时重试"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        """判断失败是否可重试：超时、连接错误、5xx、风控可重试；4xx 与无效视频不重试"""
+        if isinstance(error, APIError):
+            return error.retryable
+        if isinstance(error, (requests.Timeout, requests.ConnectionError,
+                              requests.exceptions.ChunkedEncodingError, asyncio.TimeoutError)):
+            return True
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+            return status >= 500 or status in THROTTLE_STATUS_CODES
+        if aiohttp is not None:
+            if isinstance(error, aiohttp.ClientResponseError):
+                return error.status >= 500 or error.status in THROTTLE_STATUS_CODES
+            if isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+                return True
+        return False
+
+    def call(self, func: Callable[[], T], description: str = "") -> T:
+        """
+        按策略调用 func，可重试的异常在退避后重试，其余异常或重试耗尽后抛出
+
+        Args:
+            func: 无参可调用对象
+            description: 日志中使用的请求描述
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return func()
+            except Exception as e:
+                if attempt >= self.max_retries or not self.is_retryable(e):
+                    raise
+                wait = self.delay(attempt)
+                logger.warning(
+                    f"{description or '请求'}失败: {e}，{wait:.1f} 秒后重试 "
+                    f"{attempt + 1}/{self.max_retries}"
+                )
+                time.sleep(wait)
+
+    async def call_async(self, func: Callable[[], "asyncio.Future"], description: str = ""):
+        """call 的异步版本，func 返回可等待对象"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await func()
+            except Exception as e:
+                if attempt >= self.max_retries or not self.is_retryable(e):
+                    raise
+                wait = self.delay(attempt)
+                logger.warning(
+                    f"{description or '请求'}失败: {e}，{wait:.1f} 秒后重试 "
+                    f"{attempt + 1}/{self.max_retries}"
+                )
+                await asyncio.sleep(wait)
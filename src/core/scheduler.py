@@ -0,0 +1,256 @@
+"""并发下载调度器"""
+
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Callable, List, Optional
+
+from ..config import settings, DownloadConfig
+from ..utils import get_logger
+from ..utils.cache import DownloadCache
+from ..utils.content_store import ContentStore
+from ..utils.library_scan import probe_duration
+from ..utils.playlist import sanitize_filename
+from .audio import AudioDownloader
+
+logger = get_logger(__name__)
+
+# 通知阶段线程退出的哨兵
+_STOP = object()
+
+
+class DownloadScheduler:
+    """
+    下载调度器：以流水线方式并发处理多个视频
+
+    每个视频依次经过三个阶段，各阶段有独立的线程，阶段之间用有界队列连接：
+    解析（缓存检查、视频信息、音频链接）→ 下载 → 打标签（封面下载与写入标签）。
+    解析阶段最多领先下载阶段一个队列的长度，等待期间过期的音频链接在下载前重新获取。
+    """
+
+    def __init__(
+        self,
+        cookie: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        cache: Optional[DownloadCache] = None,
+    ):
+        """
+        初始化调度器
+
+        Args:
+            cookie: Cookie 字符串
+            max_workers: 下载阶段的并发数，None 则使用配置中的 download_workers
+            cache: 下载缓存，None 则新建
+        """
+        self.max_workers = max(1, max_workers or settings.download_workers)
+        self.cache = cache or DownloadCache()
+        self.audio_downloader = AudioDownloader(cookie, self.cache.directory_index)
+        # 同一 BV 号（启用内容存储时为同一 BV 号 + 目录）只处理一次，重复提交复用同一个 Future
+        self._inflight: Dict[Any, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        factor = DownloadConfig.PIPELINE_QUEUE_FACTOR
+        resolve_workers = DownloadConfig.RESOLVE_WORKERS
+        tag_workers = DownloadConfig.TAG_WORKERS
+        self._resolve_queue: queue.Queue = queue.Queue(maxsize=resolve_workers * factor)
+        self._download_queue: queue.Queue = queue.Queue(maxsize=self.max_workers * factor)
+        self._tag_queue: queue.Queue = queue.Queue(maxsize=tag_workers * factor)
+        self._stages = [
+            (self._resolve_queue, self._start_stage("resolve", self._resolve_queue, self._resolve, resolve_workers)),
+            (self._download_queue, self._start_stage("download", self._download_queue, self._download, self.max_workers)),
+            (self._tag_queue, self._start_stage("tag", self._tag_queue, self._tag, tag_workers)),
+        ]
+        self._closed = False
+
+    def __enter__(self) -> "DownloadScheduler":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
+
+    def submit(
+        self,
+        video_info: Dict[str, Any],
+        save_path: str,
+        album: Optional[str] = None,
+    ) -> Future:
+        """
+        提交一个视频的处理任务（流水线已满时阻塞，直到解析阶段有空位）
+
+        Args:
+            video_info: 视频信息，至少包含 bvid
+            save_path: 保存路径
+            album: 专辑名（收藏夹标题）
+
+        Returns:
+            Future，结果为 {'bvid', 'title', 'file_path', 'duration', 'status', 'message'}，
+            status 为 cached / downloaded / failed
+        """
+        bv_number = video_info["bvid"]
+        # 启用内容存储时每个目录各有一份链接，音频本身由内容存储保证只下载一次
+        key = bv_number
+        if ContentStore.for_save_path(save_path):
+            key = (bv_number, os.path.normcase(os.path.abspath(save_path)))
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = Future()
+            self._inflight[key] = future
+        self._resolve_queue.put({
+            "video_info": video_info,
+            "save_path": save_path,
+            "album": album,
+            "future": future,
+        })
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """处理完已提交的任务后停止各阶段线程（按阶段顺序逐个停止）"""
+        if self._closed:
+            return
+        self._closed = True
+
+        def stop_stages() -> None:
+            for stage_queue, threads in self._stages:
+                for _ in threads:
+                    stage_queue.put(_STOP)
+                for thread in threads:
+                    thread.join()
+
+        if wait:
+            stop_stages()
+        else:
+            threading.Thread(target=stop_stages, name="scheduler-shutdown", daemon=True).start()
+
+    def _start_stage(
+        self,
+        name: str,
+        stage_queue: queue.Queue,
+        handler: Callable[[Dict[str, Any]], None],
+        count: int,
+    ) -> List[threading.Thread]:
+        """启动一个阶段的工作线程"""
+        def run() -> None:
+            while True:
+                item = stage_queue.get()
+                if item is _STOP:
+                    return
+                try:
+                    handler(item)
+                except Exception as e:
+                    logger.error(f"处理视频时发生异常 ({item['video_info']['bvid']}): {e}")
+                    self._finish(item, "failed")
+
+        threads = [
+            threading.Thread(target=run, name=f"{name}_{index}", daemon=True)
+            for index in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _resolve(self, item: Dict[str, Any]) -> None:
+        """解析阶段：命中缓存的直接进入打标签阶段，否则获取视频信息与音频链接"""
+        video_info = item["video_info"]
+        bv_number = video_info["bvid"]
+        title = video_info.get("title", bv_number)
+        invalid = video_info.get("invalid", False)
+
+        cached = self.cache.lookup(bv_number)
+        if cached:
+            cached_path, cached_title, duration = cached
+            if not duration:
+                # 从本地 MP4 头读取时长并记入缓存，之后的同步直接使用
+                duration = probe_duration(cached_path)
+                if duration:
+                    self.cache.set_durations([(bv_number, duration)])
+                else:
+                    duration = video_info.get("duration") or 0
+            # 缓存中的标题即下载时的文件名（内容存储中的文件名是 BV 号，不能用来显示）
+            local_title = cached_title or os.path.splitext(os.path.basename(cached_path))[0]
+            display_title = local_title if invalid else (title or cached_title or bv_number)
+            logger.info(f"[缓存命中] 跳过已下载: {display_title}")
+            cached_path = self.audio_downloader.place_cached(
+                cached_path,
+                item["save_path"],
+                sanitize_filename(display_title) or local_title,
+            )
+            item.update(title=display_title, file_path=cached_path, duration=duration, status="cached")
+            # 增量同步中沿用上次记录的视频已补全过标签，不再打开文件检查
+            if video_info.get("known"):
+                self._finish(item, "cached")
+                return
+            item["metadata"] = {
+                "title": display_title,
+                "artist": video_info.get("artist"),
+                "album": item["album"],
+                "cover_url": video_info.get("cover_url"),
+                "bv_number": None if invalid else bv_number,
+                "cid": None if invalid else video_info.get("cid"),
+            }
+            self._tag_queue.put(item)
+            return
+
+        logger.info(f"正在处理视频: {title or bv_number}")
+        # 收藏夹列表已带 cid 时跳过 view 接口，直接请求 playurl
+        job = self.audio_downloader.resolve(
+            bv_number=bv_number,
+            save_path=item["save_path"],
+            title=title,
+            album=item["album"],
+            cid=None if invalid else video_info.get("cid"),
+            artist=video_info.get("artist"),
+            cover_url=video_info.get("cover_url"),
+            duration=video_info.get("duration"),
+        )
+        if not job:
+            self._finish(item, "failed")
+            return
+        item["job"] = job
+        self._download_queue.put(item)
+
+    def _download(self, item: Dict[str, Any]) -> None:
+        """下载阶段：下载音频流并写入缓存"""
+        job = item["job"]
+        if not self.audio_downloader.fetch(job):
+            self._finish(item, "failed")
+            return
+        # 启用内容存储时缓存记录存储中的文件，删除某个收藏夹目录不会使记录失效；
+        # 目录中已有的文件无法放入存储时 content_path 为空，记录目录中的文件
+        self.cache.add(
+            job["bvid"], job["title"], job["content_path"] or job["file_path"], job["duration"]
+        )
+        item.update(
+            title=job["title"],
+            file_path=job["file_path"],
+            duration=job["duration"],
+            metadata=job["metadata"],
+            status="cached" if job["existing"] else "downloaded",
+        )
+        self._tag_queue.put(item)
+
+    def _tag(self, item: Dict[str, Any]) -> None:
+        """打标签阶段：下载封面并补全缺失的标签"""
+        if self.audio_downloader.ensure_metadata(file_path=item["file_path"], **item["metadata"]):
+            # 改写标签会改变文件大小与修改时间，重新记录，否则下次查找会视为文件已被替换
+            self.cache.refresh_stat(item["video_info"]["bvid"])
+        self._finish(item, item["status"])
+
+    def _finish(self, item: Dict[str, Any], status: str) -> None:
+        """设置任务结果"""
+        future: Future = item["future"]
+        if future.done():
+            return
+        bv_number = item["video_info"]["bvid"]
+        title = item.get("title") or item["video_info"].get("title") or bv_number
+        labels = {"cached": "已存在", "downloaded": "完成", "failed": "跳过"}
+        future.set_result({
+            "bvid": bv_number,
+            "title": title,
+            "file_path": None if status == "failed" else item.get("file_path"),
+            "duration": item.get("duration", 0),
+            "status": status,
+            "message": f"{labels[status]}: {title}",
+        })
@@ -1,7 +1,7 @@
 """UI 模块"""
 
 from .main_window import MainWindow
-from .worker import DownloadWorker
+from .worker import DownloadWorker, AccountSyncWorker
 from .styles import StyleSheet
 
-__all__ = ['MainWindow', 'DownloadWorker', 'StyleSheet']
+__all__ = ['MainWindow', 'DownloadWorker', 'AccountSyncWorker', 'StyleSheet']
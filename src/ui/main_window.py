@@ -1,7 +1,7 @@
 """主窗口界面"""
 
 import os
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Union
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QLineEdit, QProgressBar,
@@ -15,7 +15,7 @@ from PyQt6.QtGui import QFont, QPalette
 from ..core import BilibiliDownloader
 from ..config import settings
 from .styles import StyleSheet
-from .worker import DownloadWorker
+from .worker import DownloadWorker, AccountSyncWorker
 
 
 class MainWindow(QMainWindow):
@@ -24,7 +24,7 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.downloader: Optional[BilibiliDownloader] = None
-        self.worker: Optional[DownloadWorker] = None
+        self.worker: Optional[Union[DownloadWorker, AccountSyncWorker]] = None
 
         # 历史收藏夹记录（自动记录 URL + 名称）
         self.history_file = os.path.join(os.path.expanduser("~"), ".bilibili_favorite_history.txt")
@@ -173,18 +173,22 @@ class MainWindow(QMainWindow):
         mode_group = QButtonGroup(self)
         self.direct_radio = QRadioButton('直接输入BV号')
         self.favorite_radio = QRadioButton('从收藏夹获取')
+        self.account_radio = QRadioButton('同步整个账号')
         self.favorite_radio.setChecked(True)
         mode_group.addButton(self.direct_radio)
         mode_group.addButton(self.favorite_radio)
+        mode_group.addButton(self.account_radio)
         
         mode_layout.addWidget(self.direct_radio)
         mode_layout.addWidget(self.favorite_radio)
+        mode_layout.addWidget(self.account_radio)
         mode_layout.addStretch()
         layout.addWidget(mode_frame)
         
         # 连接信号
         self.direct_radio.toggled.connect(self.on_mode_changed)
         self.favorite_radio.toggled.connect(self.on_mode_changed)
+        self.account_radio.toggled.connect(self.on_mode_changed)
     
     def _create_input_area(self, layout):
         """创建输入区域"""
@@ -197,9 +201,13 @@ class MainWindow(QMainWindow):
         # 收藏夹模式页面
         favorite_page = self._create_favorite_input_page()
         
+        # 账号同步模式页面
+        account_page = self._create_account_input_page()
+        
         # 添加页面到堆叠窗口
         self.stacked_widget.addWidget(direct_page)
         self.stacked_widget.addWidget(favorite_page)
+        self.stacked_widget.addWidget(account_page)
         layout.addWidget(self.stacked_widget)
         
         self.on_mode_changed()  # 设置初始页面
@@ -242,6 +250,20 @@ class MainWindow(QMainWindow):
 
         return favorite_page
     
+    def _create_account_input_page(self) -> QWidget:
+        """创建账号同步模式页面"""
+        account_page = QWidget()
+        account_layout = QVBoxLayout(account_page)
+        account_layout.setContentsMargins(0, 0, 0, 0)
+        
+        user_id_label = QLabel('用户 UID *')
+        self.user_id_input = QLineEdit()
+        self.user_id_input.setPlaceholderText('输入B站用户 UID，同步该用户的所有收藏夹')
+        account_layout.addWidget(user_id_label)
+        account_layout.addWidget(self.user_id_input)
+        
+        return account_page
+    
     def _create_path_selection(self, layout):
         """创建保存路径选择区域"""
         path_frame = QFrame()
@@ -289,6 +311,8 @@ class MainWindow(QMainWindow):
         """模式切换事件处理"""
         if self.direct_radio.isChecked():
             self.stacked_widget.setCurrentIndex(0)
+        elif self.account_radio.isChecked():
+            self.stacked_widget.setCurrentIndex(2)
         else:
             self.stacked_widget.setCurrentIndex(1)
     
@@ -308,9 +332,14 @@ class MainWindow(QMainWindow):
                 QMessageBox.critical(self, '错误', f'初始化浏览器失败: {str(e)}')
                 return
         
+        if self.account_radio.isChecked():
+            self._start_account_sync()
+            return
+        
         # 获取视频列表
         video_list = []
         favorite_title = None
+        total = None
         
         if self.direct_radio.isChecked():
             # 直接输入BV号模式
@@ -319,11 +348,11 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, '警告', '请输入BV号')
                 return
         else:
-            # 收藏夹模式
+            # 收藏夹模式：只等待第一页，其余分页在下载过程中继续获取
             # 状态：正在获取收藏夹内容
             self.status_label.setText('正在获取收藏夹内容…')
-            video_list, favorite_title = self._get_bv_list_from_favorite()
-            if not video_list:
+            video_list, favorite_title, total = self._get_bv_list_from_favorite()
+            if video_list is None:
                 return
             # 记录当前收藏夹信息，供下载完成后写入历史
             # 这里复用 _get_bv_list_from_favorite 中解析出的 URL
@@ -351,7 +380,7 @@ class MainWindow(QMainWindow):
         self.status_label.setText('正在下载…')
 
         # 创建并启动工作线程
-        self._start_worker(video_list, download_path, m3u_path, favorite_title)
+        self._start_worker(video_list, download_path, m3u_path, favorite_title, total)
     
     def _get_bv_list_from_input(self):
         """从输入框获取BV号列表"""
@@ -360,7 +389,7 @@ class MainWindow(QMainWindow):
         return [{'bvid': bv} for bv in bv_input_list]
     
     def _get_bv_list_from_favorite(self):
-        """从收藏夹获取BV号列表"""
+        """从收藏夹流式获取BV号列表，返回 (视频迭代器, 收藏夹标题, 视频总数)，失败时视频迭代器为 None"""
         # 从多行输入中取第一行非空内容作为 URL
         raw_text = self.favorite_url_input.toPlainText()
         favorite_url = ""
@@ -371,17 +400,19 @@ class MainWindow(QMainWindow):
                 break
         if not favorite_url:
             QMessageBox.warning(self, '警告', '请输入收藏夹URL')
-            return [], None
+            return None, None, 0
         try:
-            video_list, favorite_title = self.downloader.get_bv_from_favorite(favorite_url)
+            video_list, favorite_title, total = self.downloader.stream_bv_from_favorite(favorite_url)
+            if not total:
+                QMessageBox.warning(self, '警告', '收藏夹中没有找到视频')
+                return None, None, 0
             # 仅记录当前收藏夹信息，真正写入历史在下载成功后进行
-            if video_list:
-                self.current_favorite_url = favorite_url
-                self.current_favorite_title = favorite_title
-            return video_list, favorite_title
+            self.current_favorite_url = favorite_url
+            self.current_favorite_title = favorite_title
+            return video_list, favorite_title, total
         except Exception as e:
             QMessageBox.critical(self, '错误', f'获取收藏夹视频失败: {str(e)}')
-            return [], None
+            return None, None, 0
     
     def _validate_save_path(self, save_path: str) -> bool:
         """验证保存路径"""
@@ -397,13 +428,7 @@ class MainWindow(QMainWindow):
         """确定下载路径和播放列表路径"""
         if is_favorite_mode and favorite_title:
             # 使用收藏夹名称作为子文件夹
-            download_path = os.path.join(save_path, favorite_title)
-            if settings.flag_replace_invalid_filename_chars:
-                # 使用格式化后的收藏夹名称作为播放列表文件名
-                m3u_filename = self._format_playlist_name(favorite_title)
-            else:
-                m3u_filename = favorite_title
-            m3u_path = os.path.join(download_path, f"{m3u_filename}.m3u")
+            download_path, m3u_path = BilibiliDownloader.favorite_paths(save_path, favorite_title)
         else:
             download_path = save_path
             m3u_path = os.path.join(save_path, 'playlist.m3u')
@@ -413,37 +438,7 @@ class MainWindow(QMainWindow):
         
         return download_path, m3u_path
     
-    def _format_playlist_name(self, playlist_name: str) -> str:
-        """
-        格式化播放列表名称（移除特殊字符，转换中文为拼音）
-        
-        Args:
-            playlist_name: 原始播放列表名称
-            
-        Returns:
-            格式化后的名称
-        """
-        import re
-        try:
-            from pypinyin import lazy_pinyin
-            # 使用 pypinyin 将中文转换为拼音
-            pinyin_list = lazy_pinyin(playlist_name)
-            result = '_'.join(pinyin_list)
-            result = result.replace("♿", "chongci")
-        except ImportError:
-            # 如果没有安装 pypinyin，直接使用原名称
-            result = playlist_name
-        
-        # 移除或替换其他特殊字符，只保留字母、数字和下划线
-        result = re.sub(r'[^\w\-_]', '_', result)
-        # 移除多余的下划线
-        result = re.sub(r'_+', '_', result)
-        # 移除开头和结尾的下划线
-        result = result.strip('_')
-        
-        return result if result else 'playlist'
-    
-    def _start_worker(self, video_list, download_path, m3u_path, favorite_title=None):
+    def _start_worker(self, video_list, download_path, m3u_path, favorite_title=None, total=None):
         """启动下载工作线程"""
         self.worker = DownloadWorker(
             downloader=self.downloader,
@@ -451,6 +446,7 @@ class MainWindow(QMainWindow):
             save_path=download_path,
             m3u_path=m3u_path,
             album=favorite_title,
+            total=total,
         )
         
         self.worker.progress.connect(self.update_progress)
@@ -464,6 +460,35 @@ class MainWindow(QMainWindow):
             self.start_btn.setEnabled(True)
             QMessageBox.critical(self, '错误', f'启动下载线程失败: {str(e)}')
     
+    def _start_account_sync(self):
+        """启动账号同步工作线程"""
+        user_id = self.user_id_input.text().strip()
+        if not user_id.isdigit():
+            QMessageBox.warning(self, '警告', '请输入有效的用户 UID')
+            return
+        
+        save_path = self.save_path_input.text()
+        if not self._validate_save_path(save_path):
+            return
+        
+        self.status_label.setText('正在同步账号收藏夹…')
+        self.worker = AccountSyncWorker(
+            downloader=self.downloader,
+            user_id=user_id,
+            save_root=save_path,
+        )
+        
+        self.worker.progress.connect(self.update_progress)
+        self.worker.finished.connect(self.download_finished)
+        self.worker.error.connect(self.download_error)
+        
+        self.start_btn.setEnabled(False)
+        try:
+            self.worker.start()
+        except Exception as e:
+            self.start_btn.setEnabled(True)
+            QMessageBox.critical(self, '错误', f'启动同步线程失败: {str(e)}')
+    
     def update_progress(self, current: int, total: int, message: str):
         """更新进度"""
         self.progress_bar.setMaximum(total)
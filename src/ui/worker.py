@@ -1,7 +1,7 @@
 """下载工作线程"""
 
 from PyQt6.QtCore import QThread, pyqtSignal
-from typing import List, Dict, Optional
+from typing import Iterable, Dict, Optional
 
 from ..core import BilibiliDownloader
 
@@ -17,21 +17,24 @@ class DownloadWorker(QThread):
     def __init__(
         self, 
         downloader: BilibiliDownloader, 
-        video_list: List[Dict[str, str]],
+        video_list: Iterable[Dict[str, str]],
         save_path: str, 
         m3u_path: str, 
         cookie: Optional[str] = None,
         album: Optional[str] = None,
+        total: Optional[int] = None,
     ):
         """
         初始化下载工作线程
         
         Args:
             downloader: 下载器实例
-            video_list: 视频信息列表
+            video_list: 视频信息列表或流式迭代器
             save_path: 保存路径
             m3u_path: M3U 播放列表路径
             cookie: Cookie 字符串
+            album: 专辑名（收藏夹标题）
+            total: 视频总数（video_list 为迭代器时用于显示进度）
         """
         super().__init__()
         self.downloader = downloader
@@ -40,6 +43,7 @@ class DownloadWorker(QThread):
         self.m3u_path = m3u_path
         self.cookie = cookie
         self.album = album
+        self.total = total
     
     def run(self):
         """执行下载任务"""
@@ -51,8 +55,55 @@ class DownloadWorker(QThread):
                 cookie=self.cookie,
                 progress_callback=self.progress.emit,
                 album=self.album,
+                total=self.total,
             )
             self.finished.emit()
         except Exception as e:
             self.error.emit(str(e))
 
+
+class AccountSyncWorker(QThread):
+    """账号同步工作线程：在后台同步用户的所有收藏夹"""
+    
+    # 信号定义
+    progress = pyqtSignal(int, int, str)  # current, total, message
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+    
+    def __init__(
+        self, 
+        downloader: BilibiliDownloader, 
+        user_id: str,
+        save_root: str, 
+        cookie: Optional[str] = None,
+    ):
+        """
+        初始化账号同步工作线程
+        
+        Args:
+            downloader: 下载器实例
+            user_id: B站用户 UID
+            save_root: 保存根目录，每个收藏夹一个子文件夹
+            cookie: Cookie 字符串
+        """
+        super().__init__()
+        self.downloader = downloader
+        self.user_id = user_id
+        self.save_root = save_root
+        self.cookie = cookie
+    
+    def run(self):
+        """执行同步任务"""
+        try:
+            synced = self.downloader.sync_user_favorites(
+                user_id=self.user_id,
+                save_root=self.save_root,
+                cookie=self.cookie,
+                progress_callback=self.progress.emit,
+            )
+            if not synced:
+                self.error.emit(f"用户 {self.user_id} 没有可同步的收藏夹")
+                return
+            self.finished.emit()
+        except Exception as e:
+            self.error.emit(str(e))
@@ -1,8 +1,8 @@
 """工具模块"""
 
 from .logger import setup_logger, get_logger
-from .playlist import convert_m3u_to_txt
+from .playlist import convert_m3u_to_txt, write_playlists
 from .cache import DownloadCache
 
-__all__ = ['setup_logger', 'get_logger', 'convert_m3u_to_txt', 'DownloadCache']
+__all__ = ['setup_logger', 'get_logger', 'convert_m3u_to_txt', 'write_playlists', 'DownloadCache']
 
@@ -2,61 +2,446 @@
 
 import json
 import os
-from typing import Optional, Tuple
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
 
+from ..config import settings
+from .dir_index import DirectoryIndex
 from .logger import get_logger
 
 logger = get_logger(__name__)
 
-CACHE_FILENAME = "download_cache.json"
+CACHE_FILENAME = "download_cache.db"
+# 旧版本使用的 JSON 缓存文件，首次启动时导入
+LEGACY_CACHE_FILENAME = "download_cache.json"
 
 # 项目根目录：src/../ 即 main.py 所在目录
 _PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# sqlite 单条语句的参数个数上限较低，批量查询时分块
+_BATCH_SIZE = 500
+
+# 比较修改时间时允许的误差（秒）：FAT/SMB 等文件系统只保存到 2 秒精度
+_MTIME_TOLERANCE = 2
+
+# 其他进程（另一个实例）写入时等待锁的最长时间（秒）
+_BUSY_TIMEOUT = 30
+
+# Windows 盘符路径（在其他系统上读取 Windows 下写入的缓存时也按不区分大小写比较）
+_DRIVE_RE = re.compile(r"^[A-Za-z]:")
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """
+    打开可被多个进程同时使用的数据库连接
+
+    WAL 模式下读不阻塞写；写冲突时等待对方提交而不是立即报 database is locked。
+    """
+    conn = sqlite3.connect(db_path, timeout=_BUSY_TIMEOUT, check_same_thread=False)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.Error as e:
+        # 网络文件系统上可能不支持 WAL，退回默认的回滚日志模式
+        logger.debug(f"无法启用 WAL ({db_path}): {e}")
+    return conn
+
+
+def _normalize_root(path: str) -> str:
+    """统一分隔符为 /，去掉末尾分隔符（保留 "D:/" 与 "/" 这样的根）"""
+    path = path.replace("\\", "/")
+    if re.fullmatch(r"[A-Za-z]:/*", path):
+        return path[:2] + "/"
+    return path.rstrip("/") or "/"
+
+
+def _relative_to(path: str, root: str) -> Optional[str]:
+    """
+    返回 path 相对 root 的路径（以 / 分隔），path 不在 root 下时返回 None
+
+    Args:
+        path: 文件路径（可以是混用 / 与 \\ 的 Windows 路径）
+        root: 已规范化的根目录
+    """
+    path = path.replace("\\", "/")
+    prefix = root if root.endswith("/") else root + "/"
+    if _DRIVE_RE.match(root) or os.name == "nt":
+        matched = path.lower().startswith(prefix.lower())
+    else:
+        matched = path.startswith(prefix)
+    return path[len(prefix):] if matched else None
+
 
 class DownloadCache:
-    """下载缓存：通过 JSON 文件记录已下载的 BV号 与本地文件路径的映射"""
+    """
+    下载缓存：通过 SQLite 记录已下载的 BV号 与本地文件路径的映射（线程安全，事务写入）
+
+    记录的文件是否仍然存在由 DirectoryIndex 判断：每个目录只扫描一次，
+    不再对每条记录单独 stat。
+
+    多个进程可以共用同一个数据库：每次读写都直接查询数据库，不在内存中保留副本，
+    其他进程新增的记录立即可见。
+
+    位于音乐库根目录下的文件按 (根目录, 相对路径) 保存，迁移音乐库时只需用
+    remap_roots 改写根目录，不必逐条改写记录，也不会触发重新下载。
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        directory_index: Optional[DirectoryIndex] = None,
+        library_roots: Optional[List[str]] = None,
+    ):
+        """
+        初始化下载缓存
+
+        Args:
+            db_path: 数据库路径，None 则使用项目根目录下的 download_cache.db
+            directory_index: 目录索引，None 则新建（与 AudioDownloader 共用时传入同一个实例）
+            library_roots: 音乐库根目录，None 则使用配置中的 library_roots
+        """
+        self.cache_path = db_path or os.path.join(_PROJECT_ROOT, CACHE_FILENAME)
+        self.directory_index = directory_index or DirectoryIndex()
+        roots = settings.library_roots if library_roots is None else library_roots
+        # 按长度降序，嵌套的根目录优先匹配更深的一个
+        self.library_roots = sorted(
+            {_normalize_root(os.path.abspath(root)) for root in roots if root}, key=len, reverse=True
+        )
+        # 并发下载时多个线程会同时读写缓存
+        self._lock = threading.RLock()
+        self._conn = _connect(self.cache_path)
+        with self._conn:
+            # 立即取得写锁：多个实例同时首次启动时只有一个执行建表与加列
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS downloads ("
+                " bvid TEXT PRIMARY KEY,"
+                " title TEXT NOT NULL,"
+                " file_path TEXT NOT NULL,"
+                " added_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS library_roots ("
+                " id INTEGER PRIMARY KEY,"
+                " path TEXT NOT NULL UNIQUE)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(downloads)")}
+            # size/mtime：记录时的文件大小与修改时间，查找时不一致说明文件已被替换或截断
+            # root_id：非空时 file_path 是相对该根目录的路径（以 / 分隔）
+            # duration：音频时长（秒），来自 playurl 或本地 MP4 头
+            for column, column_type in (
+                ("size", "INTEGER"), ("mtime", "REAL"), ("root_id", "INTEGER"), ("duration", "INTEGER"),
+            ):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE downloads ADD COLUMN {column} {column_type}")
+        self._roots: Dict[int, str] = {}
+        self._load_roots()
+        self._migrate_legacy_json()
+        self._relativize_absolute_rows()
+
+    def _load_roots(self) -> None:
+        with self._lock:
+            # 另一进程 remap_roots 后旧编号会失效，整表重新读取
+            self._roots = dict(self._conn.execute("SELECT id, path FROM library_roots"))
+
+    def _root_id(self, root: str) -> int:
+        """返回根目录的编号，不存在时新建（调用方需持有锁；其他进程可能已经插入同一根目录）"""
+        for root_id, path in self._roots.items():
+            if path == root:
+                return root_id
+        self._conn.execute("INSERT OR IGNORE INTO library_roots (path) VALUES (?)", (root,))
+        root_id = self._conn.execute("SELECT id FROM library_roots WHERE path = ?", (root,)).fetchone()[0]
+        self._roots[root_id] = root
+        return root_id
+
+    def _split(self, file_path: str) -> Tuple[Optional[int], str]:
+        """
+        将文件路径拆成 (根目录编号, 相对路径)；不在任何音乐库根目录下时返回 (None, 原路径)
+        （调用方需持有锁，且处于事务中）
+        """
+        for root in self.library_roots:
+            relative = _relative_to(file_path, root)
+            if relative:
+                return self._root_id(root), relative
+        return None, file_path
+
+    def _absolute(self, root_id: Optional[int], file_path: str) -> str:
+        """还原记录的本地路径"""
+        if root_id is None:
+            return file_path
+        if root_id not in self._roots:
+            # 其他进程新增或迁移过根目录
+            self._load_roots()
+        return os.path.join(self._roots.get(root_id, ""), *file_path.split("/"))
+
+    def _relativize_absolute_rows(self) -> None:
+        """把仍以绝对路径保存、且位于当前音乐库根目录下的记录改为相对路径"""
+        if not self.library_roots:
+            return
+        with self._lock:
+            try:
+                with self._conn:
+                    rows = self._conn.execute(
+                        "SELECT bvid, file_path FROM downloads WHERE root_id IS NULL"
+                    ).fetchall()
+                    updates = []
+                    for bvid, file_path in rows:
+                        root_id, relative = self._split(file_path)
+                        if root_id is not None:
+                            updates.append((root_id, relative, bvid))
+                    self._conn.executemany(
+                        "UPDATE downloads SET root_id = ?, file_path = ? WHERE bvid = ?", updates
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"转换下载缓存路径失败: {e}")
+                return
+        if updates:
+            logger.info(f"已将 {len(updates)} 条下载记录改为相对音乐库根目录保存")
+
+    def remap_roots(self, mapping: Mapping[str, str]) -> int:
+        """
+        迁移音乐库：把记录中的旧根目录改写为新根目录（如 D:/Music -> /mnt/music）
+
+        相对路径记录只需改写根目录表；以绝对路径保存、位于旧目录下的记录
+        （例如旧版缓存导入的 Windows 路径）一并转换为新根目录下的相对路径。
+        复制音乐库不一定保留修改时间，迁移的记录清空大小与修改时间，下次查找时重新记录。
 
-    def __init__(self):
-        self.cache_path = os.path.join(_PROJECT_ROOT, CACHE_FILENAME)
-        self._cache = self._load()
+        Args:
+            mapping: {旧根目录: 新根目录}
 
-    def _load(self) -> dict:
-        if os.path.exists(self.cache_path):
+        Returns:
+            受影响的下载记录数
+        """
+        affected = 0
+        with self._lock:
+            try:
+                with self._conn:
+                    for old, new in mapping.items():
+                        old_root, new_root = _normalize_root(old), _normalize_root(os.path.abspath(new))
+                        new_id = self._root_id(new_root)
+                        for root_id, path in list(self._roots.items()):
+                            # 旧根目录本身，或旧根目录下更深的根目录
+                            sub = _relative_to(path + "/", old_root)
+                            if root_id != new_id and sub is not None:
+                                sub = sub.rstrip("/")
+                                target = _normalize_root(f"{new_root}/{sub}") if sub else new_root
+                                target_id = self._root_id(target)
+                                affected += self._conn.execute(
+                                    "UPDATE downloads SET root_id = ?, size = NULL, mtime = NULL "
+                                    "WHERE root_id = ?",
+                                    (target_id, root_id),
+                                ).rowcount
+                                self._conn.execute("DELETE FROM library_roots WHERE id = ?", (root_id,))
+                                del self._roots[root_id]
+                        rows = self._conn.execute(
+                            "SELECT bvid, file_path FROM downloads WHERE root_id IS NULL"
+                        ).fetchall()
+                        updates = [
+                            (new_id, relative, bvid)
+                            for bvid, file_path in rows
+                            for relative in [_relative_to(file_path, old_root)]
+                            if relative
+                        ]
+                        self._conn.executemany(
+                            "UPDATE downloads SET root_id = ?, file_path = ?, size = NULL, mtime = NULL "
+                            "WHERE bvid = ?",
+                            updates,
+                        )
+                        affected += len(updates)
+            except sqlite3.Error as e:
+                logger.error(f"迁移音乐库根目录失败: {e}")
+                self._load_roots()
+                return 0
+        self.directory_index.invalidate()
+        logger.info(f"音乐库根目录迁移完成，共更新 {affected} 条下载记录")
+        return affected
+
+    def _migrate_legacy_json(self) -> None:
+        """一次性导入旧版 download_cache.json（保留原文件，导入完成后记录标记，不再重复导入）"""
+        legacy_path = os.path.join(os.path.dirname(self.cache_path), LEGACY_CACHE_FILENAME)
+        with self._lock:
+            migrated = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'legacy_json_migrated'"
+            ).fetchone()
+            if migrated or not os.path.exists(legacy_path):
+                return
             try:
-                with open(self.cache_path, "r", encoding="utf-8") as f:
+                with open(legacy_path, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                logger.info(f"已加载下载缓存，共 {len(data)} 条记录")
-                return data
             except (json.JSONDecodeError, OSError) as e:
-                logger.warning(f"读取缓存文件失败，将重新创建: {e}")
-        return {}
-
-    def _save(self):
-        try:
-            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
-            with open(self.cache_path, "w", encoding="utf-8") as f:
-                json.dump(self._cache, f, ensure_ascii=False, indent=2)
-        except OSError as e:
-            logger.error(f"保存缓存文件失败: {e}")
-
-    def lookup(self, bvid: str) -> Optional[Tuple[str, str]]:
-        """
-        查找 BV号 对应的本地文件路径和标题。
-        仅当缓存中存在且文件确实存在时返回 (file_path, title)，否则返回 None。
-        """
-        entry = self._cache.get(bvid)
-        if entry:
-            file_path = entry.get("file_path", "")
-            if os.path.exists(file_path):
-                return file_path, entry.get("title", "")
-            else:
-                logger.debug(f"缓存记录的文件不存在，移除: {bvid} -> {file_path}")
-                del self._cache[bvid]
-                self._save()
-        return None
-
-    def add(self, bvid: str, title: str, file_path: str):
+                logger.warning(f"读取旧版缓存文件失败，跳过导入: {e}")
+                return
+            now = time.time()
+            with self._conn:
+                rows = [
+                    (bvid, entry.get("title", ""), *self._split(entry["file_path"]), now)
+                    for bvid, entry in data.items()
+                    if isinstance(entry, dict) and entry.get("file_path")
+                ]
+                # 已有记录优先：旧文件里的同一 BV 号不覆盖新记录
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO downloads (bvid, title, root_id, file_path, added_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_json_migrated', ?)",
+                    (str(now),),
+                )
+            logger.info(f"已从 {LEGACY_CACHE_FILENAME} 导入 {len(rows)} 条下载记录")
+
+    def lookup(self, bvid: str) -> Optional[Tuple[str, str, int]]:
+        """
+        查找 BV号 对应的本地文件路径、标题和时长。
+        仅当缓存中存在且文件确实存在时返回 (file_path, title, duration)，否则返回 None；
+        尚未记录时长时 duration 为 0。
+        """
+        return self.lookup_many([bvid]).get(bvid)
+
+    def lookup_many(self, bvids: Iterable[str]) -> Dict[str, Tuple[str, str, int]]:
+        """
+        批量查找，文件已不存在的记录会被移除（按目录扫描判断，每个目录只列一次；
+        扫描结果中没有的文件删除前再单独确认一次，避免删掉其他进程刚写入的记录）
+
+        文件所在目录整个不存在时（音乐库已迁移但尚未 remap_roots、或网络盘未挂载）
+        只视为未命中，不删除记录。
+
+        文件的大小或修改时间与记录不一致时（被替换或截断）视为未命中并移除记录；
+        尚未记录大小与修改时间的（旧版本记录、迁移后的记录）直接补记当前值。
+
+        Returns:
+            {BV号: (file_path, title, duration)}，未命中的不包含在结果中
+        """
+        bvids = list(dict.fromkeys(bvids))
+        found: Dict[str, Tuple[str, str, int]] = {}
+        stale = []
+        backfill = []
+        directory_exists: Dict[str, bool] = {}
+        with self._lock:
+            for start in range(0, len(bvids), _BATCH_SIZE):
+                chunk = bvids[start:start + _BATCH_SIZE]
+                rows = self._conn.execute(
+                    "SELECT bvid, root_id, file_path, title, duration, size, mtime FROM downloads "
+                    f"WHERE bvid IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for bvid, root_id, stored_path, title, duration, size, mtime in rows:
+                    file_path = self._absolute(root_id, stored_path)
+                    present = self.directory_index.exists(file_path)
+                    if not present and os.path.exists(file_path):
+                        # 目录扫描之后由其他进程写入的文件
+                        self.directory_index.add(file_path)
+                        present = True
+                    if present:
+                        stat = self.directory_index.stat(file_path)
+                        if stat and size is None:
+                            backfill.append((stat[0], stat[1], bvid))
+                        elif not stat or not self._same_stat(stat, size, mtime):
+                            logger.info(f"缓存记录的文件已变化（大小或修改时间不同），移除: {bvid} -> {file_path}")
+                            stale.append((bvid,))
+                            continue
+                        found[bvid] = (file_path, title, duration or 0)
+                        continue
+                    directory = os.path.dirname(file_path)
+                    if directory not in directory_exists:
+                        directory_exists[directory] = os.path.isdir(directory)
+                    if directory_exists[directory]:
+                        logger.debug(f"缓存记录的文件不存在，移除: {bvid} -> {file_path}")
+                        stale.append((bvid,))
+            if stale:
+                self._execute_many("DELETE FROM downloads WHERE bvid = ?", stale)
+            if backfill:
+                self._execute_many("UPDATE downloads SET size = ?, mtime = ? WHERE bvid = ?", backfill)
+        return found
+
+    @staticmethod
+    def _same_stat(stat: Tuple[int, float], size: Optional[int], mtime: Optional[float]) -> bool:
+        """文件当前的 (大小, 修改时间) 是否与记录一致"""
+        return stat[0] == size and (mtime is None or abs(stat[1] - mtime) <= _MTIME_TOLERANCE)
+
+    def refresh_stat(self, bvid: str) -> None:
+        """
+        重新记录文件的大小与修改时间（本程序改写文件后调用，例如补全标签）
+
+        硬链接的文件共用同一份数据，通过任一路径改写后都需要刷新。
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT root_id, file_path FROM downloads WHERE bvid = ?", (bvid,)
+            ).fetchone()
+            if not row:
+                return
+            file_path = self._absolute(*row)
+            # 目录索引中的 DirEntry 会缓存旧的 stat，这里直接 stat 并更新索引
+            self.directory_index.add(file_path)
+            stat = self.directory_index.stat(file_path)
+            if stat:
+                self._execute_many(
+                    "UPDATE downloads SET size = ?, mtime = ? WHERE bvid = ?", [(stat[0], stat[1], bvid)]
+                )
+
+    def add(self, bvid: str, title: str, file_path: str, duration: Optional[int] = None):
         """添加一条下载记录"""
-        self._cache[bvid] = {"title": title, "file_path": file_path}
-        self._save()
+        self.add_many([(bvid, title, file_path, duration)])
+
+    def add_many(self, entries: Iterable[Tuple]) -> None:
+        """
+        批量添加下载记录（单个事务），每项为 (bvid, title, file_path) 或 (bvid, title, file_path, duration)
+
+        未提供时长（或为 0）时保留已记录的时长
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                with self._conn:
+                    rows = []
+                    for bvid, title, file_path, *rest in entries:
+                        duration = (rest[0] if rest else None) or None
+                        size, mtime = self.directory_index.stat(file_path) or (None, None)
+                        root_id, stored_path = self._split(os.path.abspath(file_path))
+                        rows.append((bvid, title, root_id, stored_path, now, size, mtime, duration))
+                    self._conn.executemany(
+                        "INSERT INTO downloads "
+                        "(bvid, title, root_id, file_path, added_at, size, mtime, duration) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT(bvid) DO UPDATE SET "
+                        "title = excluded.title, root_id = excluded.root_id, "
+                        "file_path = excluded.file_path, added_at = excluded.added_at, "
+                        "size = excluded.size, mtime = excluded.mtime, "
+                        "duration = COALESCE(excluded.duration, downloads.duration)",
+                        rows,
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"写入下载缓存失败: {e}")
+                self._load_roots()
+
+    def missing_durations(self) -> List[Tuple[str, str]]:
+        """
+        列出尚未记录时长的下载记录
+
+        Returns:
+            [(BV号, 本地文件路径)]
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT bvid, root_id, file_path FROM downloads WHERE duration IS NULL OR duration <= 0"
+            ).fetchall()
+            return [(bvid, self._absolute(root_id, file_path)) for bvid, root_id, file_path in rows]
+
+    def set_durations(self, durations: Iterable[Tuple[str, int]]) -> None:
+        """批量记录时长，每项为 (bvid, 秒)"""
+        self._execute_many(
+            "UPDATE downloads SET duration = ? WHERE bvid = ?",
+            [(duration, bvid) for bvid, duration in durations if duration],
+        )
+
+    def _execute_many(self, sql: str, rows) -> None:
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(sql, rows)
+            except sqlite3.Error as e:
+                logger.error(f"写入下载缓存失败: {e}")
@@ -0,0 +1,70 @@
+"""内容存储：每个音频按 BV号/cid 只保存一份，收藏夹目录中的文件通过硬链接（或软链接、复制）指向它"""
+
+import os
+import shutil
+from typing import Optional
+
+from ..config import settings
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+STORE_DIRNAME = ".store"
+
+
+class ContentStore:
+    """按 BV号/cid 寻址的音频存储"""
+
+    def __init__(self, root: str):
+        """
+        初始化内容存储
+
+        Args:
+            root: 存储目录（应与收藏夹目录位于同一文件系统，硬链接才能生效）
+        """
+        self.root = root
+
+    @classmethod
+    def for_save_path(cls, save_path: str) -> Optional["ContentStore"]:
+        """
+        返回保存路径对应的内容存储：优先使用配置中的 store_path，
+        否则使用保存路径上一级目录下的 .store（收藏夹子文件夹共用同一个存储）；
+        配置关闭 content_store 时返回 None
+        """
+        if not settings.content_store:
+            return None
+        root = settings.store_path or os.path.join(
+            os.path.dirname(os.path.abspath(save_path)), STORE_DIRNAME
+        )
+        return cls(root)
+
+    def path_for(self, bvid: str, cid: Optional[int]) -> str:
+        """音频在存储中的路径"""
+        name = f"{bvid}_{cid}.m4a" if cid else f"{bvid}.m4a"
+        return os.path.join(self.root, name)
+
+    @staticmethod
+    def link(source: str, target: str) -> Optional[str]:
+        """
+        在 target 处放置 source 的副本：依次尝试硬链接、软链接、复制
+
+        Returns:
+            使用的方式（hardlink / symlink / copy），全部失败时返回 None
+        """
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        attempts = (
+            ("hardlink", os.link),
+            # 软链接指向存储中的绝对路径，删除收藏夹目录不影响存储本身
+            ("symlink", lambda src, dst: os.symlink(os.path.abspath(src), dst)),
+            ("copy", shutil.copy2),
+        )
+        for method, place in attempts:
+            try:
+                place(source, target)
+                return method
+            except FileExistsError:
+                return "existing"
+            except (OSError, NotImplementedError) as e:
+                logger.debug(f"{method} 失败 ({source} -> {target}): {e}")
+        logger.error(f"无法将音频放入目录: {source} -> {target}")
+        return None
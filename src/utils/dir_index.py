@@ -0,0 +1,95 @@
+"""目录索引：每个目录只列一次（os.scandir），之后的文件存在性检查都在内存中完成"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+_Entry = Union[os.DirEntry, os.stat_result]
+
+
+class DirectoryIndex:
+    """
+    按目录缓存文件列表（线程安全）
+
+    音乐目录挂载在 NAS 上时每次 stat 都是一次网络往返；这里每个目录只列一次，
+    逐个文件的检查直接查内存。文件大小与修改时间在需要时才读取（Windows 上
+    scandir 已经带回这些信息，不产生额外请求）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirs: Dict[str, Dict[str, _Entry]] = {}
+
+    @staticmethod
+    def _split(file_path: str) -> Tuple[str, str]:
+        directory, name = os.path.split(os.path.abspath(file_path))
+        return os.path.normcase(directory), os.path.normcase(name)
+
+    def _listing(self, directory: str) -> Dict[str, _Entry]:
+        """返回目录的文件表，首次访问时扫描（调用方需持有锁）"""
+        listing = self._dirs.get(directory)
+        if listing is None:
+            listing = {}
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            listing[os.path.normcase(entry.name)] = entry
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"扫描目录失败 ({directory}): {e}")
+            logger.debug(f"已扫描目录 {directory}，共 {len(listing)} 个文件")
+            self._dirs[directory] = listing
+        return listing
+
+    def exists(self, file_path: str) -> bool:
+        """文件是否存在（按目录扫描结果判断）"""
+        directory, name = self._split(file_path)
+        with self._lock:
+            return name in self._listing(directory)
+
+    def stat(self, file_path: str) -> Optional[Tuple[int, float]]:
+        """
+        返回文件的 (大小, 修改时间)，文件不存在时返回 None
+        """
+        directory, name = self._split(file_path)
+        with self._lock:
+            entry = self._listing(directory).get(name)
+        if entry is None:
+            return None
+        try:
+            result = entry.stat() if isinstance(entry, os.DirEntry) else entry
+        except OSError:
+            return None
+        return result.st_size, result.st_mtime
+
+    def add(self, file_path: str) -> None:
+        """记录新写入的文件（下载完成后调用，使索引与磁盘保持一致）"""
+        directory, name = self._split(file_path)
+        try:
+            result = os.stat(file_path)
+        except OSError:
+            return
+        with self._lock:
+            self._listing(directory)[name] = result
+
+    def discard(self, file_path: str) -> None:
+        """从索引中移除一个文件"""
+        directory, name = self._split(file_path)
+        with self._lock:
+            listing = self._dirs.get(directory)
+            if listing is not None:
+                listing.pop(name, None)
+
+    def invalidate(self, directory: Optional[str] = None) -> None:
+        """丢弃目录的扫描结果，下次访问时重新扫描；directory 为 None 时丢弃全部"""
+        with self._lock:
+            if directory is None:
+                self._dirs.clear()
+            else:
+                self._dirs.pop(os.path.normcase(os.path.abspath(directory)), None)
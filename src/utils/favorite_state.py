@@ -0,0 +1,81 @@
+"""收藏夹同步状态：记录每个收藏夹上次同步时的视频顺序与总数，用于增量同步"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from .cache import _PROJECT_ROOT
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+STATE_DIRNAME = "favorite_state"
+
+# 只保存生成播放列表和下载所需的字段
+_VIDEO_FIELDS = ("bvid", "title", "artist", "cover_url", "cid", "duration", "invalid")
+
+
+class FavoriteStateStore:
+    """收藏夹同步状态存储：每个收藏夹一个 JSON 文件"""
+
+    def __init__(self, state_dir: Optional[str] = None):
+        """
+        初始化状态存储
+
+        Args:
+            state_dir: 状态文件目录，None 则使用项目根目录下的 favorite_state
+        """
+        self.state_dir = state_dir or os.path.join(_PROJECT_ROOT, STATE_DIRNAME)
+
+    def _path(self, media_id: str) -> str:
+        return os.path.join(self.state_dir, f"{media_id}.json")
+
+    def load(self, media_id: str) -> Optional[Dict[str, Any]]:
+        """
+        读取收藏夹上次同步的状态
+
+        Returns:
+            {'media_id', 'title', 'media_count', 'videos'}，不存在或损坏时返回 None
+        """
+        path = self._path(media_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"读取收藏夹同步状态失败，将完整同步 ({media_id}): {e}")
+            return None
+
+    def save(
+        self,
+        media_id: str,
+        title: Optional[str],
+        media_count: int,
+        videos: List[Dict[str, Any]],
+    ) -> None:
+        """
+        保存收藏夹本次同步的状态（先写临时文件再替换，避免写到一半时损坏）
+
+        Args:
+            media_id: 收藏夹 ID
+            title: 收藏夹标题
+            media_count: 接口返回的视频总数
+            videos: 按收藏夹顺序排列的视频信息
+        """
+        state = {
+            "media_id": media_id,
+            "title": title,
+            "media_count": media_count,
+            "videos": [{key: video.get(key) for key in _VIDEO_FIELDS} for video in videos],
+        }
+        path = self._path(media_id)
+        # 临时文件名带进程号，多个实例同时同步同一收藏夹时互不覆盖写到一半的文件
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"保存收藏夹同步状态失败 ({media_id}): {e}")
@@ -0,0 +1,116 @@
+"""跨进程文件锁：多个实例（GUI 与定时任务、并行同步多个收藏夹）共用同一项目目录与音乐库时串行化写操作"""
+
+import hashlib
+import os
+from typing import Optional
+
+from .cache import _PROJECT_ROOT
+from .logger import get_logger
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+logger = get_logger(__name__)
+
+LOCK_DIRNAME = ".locks"
+
+
+class FileLock:
+    """
+    基于锁文件的排他锁（阻塞等待），可作为上下文管理器使用
+
+    进程退出（包括崩溃）时操作系统自动释放锁，不会留下需要手动清理的死锁。
+    """
+
+    def __init__(self, lock_path: str, remove_on_release: bool = False):
+        """
+        初始化文件锁
+
+        Args:
+            lock_path: 锁文件路径
+            remove_on_release: 释放时是否删除锁文件（每个目标一个锁文件时使用，避免锁文件不断累积）
+        """
+        self.lock_path = lock_path
+        self.remove_on_release = remove_on_release
+        self._file = None
+
+    @classmethod
+    def for_target(cls, target: str, lock_dir: Optional[str] = None) -> "FileLock":
+        """
+        返回保护某个目标文件的锁：锁文件放在项目根目录的 .locks 下，不在音乐目录中留下额外文件
+
+        Args:
+            target: 要保护的文件路径
+            lock_dir: 锁文件目录，None 则使用项目根目录下的 .locks
+        """
+        key = hashlib.sha1(os.path.normcase(os.path.abspath(target)).encode("utf-8")).hexdigest()
+        lock_path = os.path.join(lock_dir or os.path.join(_PROJECT_ROOT, LOCK_DIRNAME), f"{key}.lock")
+        return cls(lock_path, remove_on_release=True)
+
+    def acquire(self) -> None:
+        """获取锁，其他进程持有时阻塞等待"""
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        while True:
+            self._file = open(self.lock_path, "a+b")
+            try:
+                if os.name == "nt":
+                    self._file.seek(0)
+                    while True:
+                        try:
+                            # LK_LOCK 重试约 10 秒后仍失败时抛出 OSError，继续等待
+                            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            logger.debug(f"等待文件锁: {self.lock_path}")
+                    return
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                self._file.close()
+                self._file = None
+                raise
+            if self._is_current():
+                return
+            # 等待期间上一个持有者删除了锁文件，锁住的是已删除的文件，重新打开
+            self._file.close()
+
+    def _is_current(self) -> bool:
+        """已打开的锁文件是否仍是 lock_path 指向的文件"""
+        try:
+            return os.path.samestat(os.fstat(self._file.fileno()), os.stat(self.lock_path))
+        except OSError:
+            return False
+
+    def release(self) -> None:
+        """释放锁"""
+        if self._file is None:
+            return
+        try:
+            if os.name == "nt":
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                if self.remove_on_release:
+                    # 持有锁时删除：等待中的进程获得锁后会发现文件已删除并重新打开
+                    self._remove()
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+        if os.name == "nt" and self.remove_on_release:
+            # Windows 上其他进程仍打开该文件时删除会失败，由最后一个持有者删除
+            self._remove()
+
+    def _remove(self) -> None:
+        try:
+            os.remove(self.lock_path)
+        except OSError:
+            pass
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
@@ -0,0 +1,145 @@
+"""CDN 节点测速记录：按主机记录音频流下载吞吐量（跨运行保存），用于优先选择更快的节点"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+from .cache import _PROJECT_ROOT
+from .file_lock import FileLock
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+HOST_STATS_FILENAME = "host_stats.json"
+
+# 吞吐量的指数滑动平均系数：越大越看重最近一次的测量
+_EWMA_ALPHA = 0.3
+# 失败或卡顿时吞吐量打的折扣
+_FAILURE_PENALTY = 0.5
+# 两次写盘之间的最短间隔（秒）
+_SAVE_INTERVAL = 30
+
+
+def host_of(url: str) -> str:
+    """提取 URL 的主机名"""
+    return urlparse(url).hostname or ""
+
+
+class HostStats:
+    """按主机记录的吞吐量（字节/秒，指数滑动平均），线程安全"""
+
+    def __init__(self, stats_path: Optional[str] = None):
+        """
+        初始化测速记录
+
+        Args:
+            stats_path: 记录文件路径，None 则使用项目根目录下的 host_stats.json
+        """
+        self.stats_path = stats_path or os.path.join(_PROJECT_ROOT, HOST_STATS_FILENAME)
+        self._lock = threading.Lock()
+        self._throughput: Dict[str, float] = {}
+        # 本进程自上次保存以来更新过的主机，保存时只用这些覆盖文件中的记录
+        self._changed: Set[str] = set()
+        self._last_save = time.monotonic()
+        self._load()
+
+    def _load(self) -> None:
+        self._throughput = self._read()
+
+    def _read(self) -> Dict[str, float]:
+        if not os.path.exists(self.stats_path):
+            return {}
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                return {host: float(value) for host, value in json.load(f).items()}
+        except (json.JSONDecodeError, OSError, ValueError, AttributeError) as e:
+            logger.warning(f"读取节点测速记录失败，将重新测速: {e}")
+            return {}
+
+    def rank(self, urls: List[str]) -> List[str]:
+        """
+        按记录的吞吐量从快到慢排序候选 URL
+
+        没有记录的主机按已知主机的平均值参与排序，吞吐量相同时保持接口返回的顺序。
+        """
+        with self._lock:
+            known = [self._throughput[host_of(url)] for url in urls if host_of(url) in self._throughput]
+            neutral = sum(known) / len(known) if known else 0.0
+            scores = {url: self._throughput.get(host_of(url), neutral) for url in urls}
+        return sorted(urls, key=lambda url: -scores[url])
+
+    def record(self, url: str, size: int, seconds: float) -> None:
+        """记录一次成功传输的字节数与耗时"""
+        if size <= 0 or seconds <= 0:
+            return
+        self._update(host_of(url), size / seconds)
+
+    def record_failure(self, url: str) -> None:
+        """记录一次失败或卡顿：降低该主机的吞吐量估计"""
+        host = host_of(url)
+        with self._lock:
+            if host in self._throughput:
+                self._throughput[host] *= _FAILURE_PENALTY
+                self._changed.add(host)
+        self._maybe_save()
+
+    def _update(self, host: str, throughput: float) -> None:
+        with self._lock:
+            previous = self._throughput.get(host)
+            self._throughput[host] = (
+                throughput if previous is None
+                else _EWMA_ALPHA * throughput + (1 - _EWMA_ALPHA) * previous
+            )
+            self._changed.add(host)
+        self._maybe_save()
+
+    def _maybe_save(self) -> None:
+        if time.monotonic() - self._last_save >= _SAVE_INTERVAL:
+            self.save()
+
+    def save(self) -> None:
+        """
+        将记录写入文件（先写临时文件再替换）
+
+        持有跨进程锁重新读取文件，只用本进程更新过的主机覆盖，
+        其他实例同时写入的测速结果不会丢失；合并结果同时更新到内存。
+        """
+        with self._lock:
+            if not self._changed:
+                return
+            updates = {host: self._throughput[host] for host in self._changed}
+            self._changed = set()
+            self._last_save = time.monotonic()
+        tmp_path = f"{self.stats_path}.{os.getpid()}.tmp"
+        try:
+            with FileLock(f"{self.stats_path}.lock"):
+                merged = self._read()
+                merged.update(updates)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(merged, f, indent=2)
+                os.replace(tmp_path, self.stats_path)
+        except OSError as e:
+            logger.warning(f"保存节点测速记录失败: {e}")
+            return
+        with self._lock:
+            for host, throughput in merged.items():
+                if host not in self._changed:
+                    self._throughput[host] = throughput
+
+
+_shared_stats: Optional[HostStats] = None
+_shared_stats_lock = threading.Lock()
+
+
+def get_host_stats() -> HostStats:
+    """获取进程内共享的测速记录，进程退出时自动保存"""
+    global _shared_stats
+    with _shared_stats_lock:
+        if _shared_stats is None:
+            _shared_stats = HostStats()
+            atexit.register(_shared_stats.save)
+        return _shared_stats
@@ -0,0 +1,160 @@
+"""音乐库扫描：从音频文件中写入的 BV 号标签重建下载缓存，缓存丢失时无需重新下载；读取本地音频时长"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from mutagen.mp4 import MP4
+
+from .cache import DownloadCache
+from .content_store import STORE_DIRNAME
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# 下载时写入 M4A 的自定义标签（iTunes freeform 原子 ----:com.tsbot:<name>）
+TAG_NAMESPACE = "com.tsbot"
+BVID_TAG = f"----:{TAG_NAMESPACE}:bvid"
+CID_TAG = f"----:{TAG_NAMESPACE}:cid"
+DOWNLOADED_AT_TAG = f"----:{TAG_NAMESPACE}:downloaded_at"
+
+# 内容存储中的文件名 <BV号>_<cid>.m4a，旧版本下载、尚未写入标签的文件也能据此识别
+_STORE_NAME_RE = re.compile(r"^(BV[0-9A-Za-z]{10})(?:_\d+)?\.m4a$")
+
+# 每个工作进程一次处理的文件数，减少进程间通信次数
+_CHUNK_SIZE = 64
+
+
+def _freeform_text(tags, key: str) -> Optional[str]:
+    values = tags.get(key) if tags else None
+    if not values:
+        return None
+    return bytes(values[0]).decode("utf-8", errors="replace").strip() or None
+
+
+def probe_duration(file_path: str) -> Optional[int]:
+    """
+    从本地 MP4 头读取音频时长（秒），不发起网络请求
+
+    Returns:
+        时长（四舍五入到秒），无法读取时返回 None
+    """
+    try:
+        length = MP4(file_path).info.length
+    except Exception as e:
+        logger.debug(f"无法读取音频时长 ({file_path}): {e}")
+        return None
+    return int(round(length)) if length else None
+
+
+def read_track(file_path: str) -> Optional[Tuple[str, str, str, Optional[int]]]:
+    """
+    读取一个音频文件对应的 BV 号与时长（在工作进程中执行）
+
+    Returns:
+        (BV号, 文件路径, 标题, 时长)，无法识别时返回 None
+    """
+    name = os.path.basename(file_path)
+    stem = os.path.splitext(name)[0]
+    try:
+        audio = MP4(file_path)
+        tags = audio.tags
+        duration = int(round(audio.info.length)) if audio.info.length else None
+    except Exception as e:
+        logger.debug(f"无法读取标签 ({file_path}): {e}")
+        tags = None
+        duration = None
+    bvid = _freeform_text(tags, BVID_TAG)
+    if not bvid:
+        match = _STORE_NAME_RE.match(name)
+        if not match:
+            return None
+        bvid = match.group(1)
+    title_values = tags.get("\xa9nam") if tags else None
+    # 缓存中的标题用作收藏夹目录中的文件名；内容存储中的文件名是 BV 号，改用标题标签
+    in_store = os.path.basename(os.path.dirname(file_path)) == STORE_DIRNAME
+    title = (str(title_values[0]) if in_store and title_values else None) or stem
+    return bvid, file_path, title, duration
+
+
+def iter_audio_files(roots: Iterable[str]) -> Iterator[str]:
+    """递归列出根目录下所有 .m4a 文件（每个目录一次 os.scandir）"""
+    pending = [root for root in roots if os.path.isdir(root)]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.name.lower().endswith(".m4a"):
+                        yield entry.path
+        except OSError as e:
+            logger.warning(f"扫描目录失败 ({directory}): {e}")
+
+
+def scan_library(
+    roots: Iterable[str],
+    cache: Optional[DownloadCache] = None,
+    workers: Optional[int] = None,
+) -> int:
+    """
+    扫描音乐库并重建下载缓存
+
+    文件在多个进程中并行读取标签。同一 BV 号有多个文件时优先记录内容存储中的文件，
+    与下载时的记录方式一致。
+
+    Args:
+        roots: 要扫描的根目录
+        cache: 下载缓存，None 则新建
+        workers: 进程数，None 则使用 CPU 核数
+
+    Returns:
+        写入缓存的记录数
+    """
+    files: List[str] = list(iter_audio_files(roots))
+    logger.info(f"共找到 {len(files)} 个音频文件，开始读取标签")
+
+    tracks: Dict[str, Tuple[str, str, Optional[int]]] = {}
+    unknown = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(read_track, files, chunksize=_CHUNK_SIZE):
+            if result is None:
+                unknown += 1
+                continue
+            bvid, file_path, title, duration = result
+            in_store = os.path.basename(os.path.dirname(file_path)) == STORE_DIRNAME
+            if bvid not in tracks or in_store:
+                tracks[bvid] = (file_path, title, duration)
+
+    cache = cache or DownloadCache()
+    cache.add_many(
+        (bvid, title, file_path, duration) for bvid, (file_path, title, duration) in tracks.items()
+    )
+    logger.info(f"音乐库扫描完成：{len(tracks)} 个视频写入缓存，{unknown} 个文件没有 BV 号标签")
+    return len(tracks)
+
+
+def probe_missing_durations(cache: Optional[DownloadCache] = None, workers: Optional[int] = None) -> int:
+    """
+    为缓存中尚未记录时长的文件读取本地时长并写回缓存（多线程，每个文件只读取 MP4 头）
+
+    Args:
+        cache: 下载缓存，None 则新建
+        workers: 线程数，None 则使用 ThreadPoolExecutor 的默认值
+
+    Returns:
+        补全时长的记录数
+    """
+    cache = cache or DownloadCache()
+    missing = cache.missing_durations()
+    if not missing:
+        return 0
+    logger.info(f"共 {len(missing)} 条记录缺少时长，开始读取本地文件")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        durations = list(executor.map(probe_duration, [file_path for _, file_path in missing]))
+    found = [(bvid, duration) for (bvid, _), duration in zip(missing, durations) if duration]
+    cache.set_durations(found)
+    logger.info(f"已补全 {len(found)} 条记录的时长")
+    return len(found)
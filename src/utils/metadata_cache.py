@@ -0,0 +1,148 @@
+"""视频元数据缓存：以 BV 号为键持久化 view 接口的结果，支持 TTL 与失效视频的负缓存"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from ..config import settings
+from .cache import _PROJECT_ROOT, _connect
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+METADATA_CACHE_FILENAME = "video_info_cache.db"
+
+# sqlite 单条语句的参数个数上限较低，批量查询时分块
+_BATCH_SIZE = 500
+
+
+class VideoInfoCache:
+    """视频元数据缓存（SQLite，线程安全）"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初始化元数据缓存
+
+        Args:
+            db_path: 数据库路径，None 则使用项目根目录下的 video_info_cache.db
+        """
+        self.db_path = db_path or os.path.join(_PROJECT_ROOT, METADATA_CACHE_FILENAME)
+        self._lock = threading.Lock()
+        self._conn = _connect(self.db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS video_info ("
+            " bvid TEXT PRIMARY KEY,"
+            " info TEXT,"           # 成功时为精简后的视频信息 JSON，负缓存时为 NULL
+            " error_code INTEGER,"  # 负缓存时记录接口返回的业务码
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _slim(info: Dict[str, Any]) -> Dict[str, Any]:
+        """只保留下载与打标签用到的字段"""
+        owner = info.get("owner") or {}
+        return {
+            "bvid": info.get("bvid"),
+            "title": info.get("title"),
+            "owner": {"mid": owner.get("mid"), "name": owner.get("name")},
+            "pic": info.get("pic"),
+            "cid": info.get("cid"),
+            "duration": info.get("duration"),
+        }
+
+    @staticmethod
+    def _is_fresh(info: Optional[str], fetched_at: float, now: float) -> bool:
+        ttl_hours = settings.video_info_ttl_hours if info is not None else settings.negative_ttl_hours
+        return now - fetched_at < ttl_hours * 3600
+
+    def get(self, bvid: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        查询单个视频
+
+        Returns:
+            (是否命中, 视频信息)；命中负缓存时为 (True, None)
+        """
+        found = self.get_many([bvid])
+        if bvid in found:
+            return True, found[bvid]
+        return False, None
+
+    def get_many(self, bvids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        批量查询未过期的记录
+
+        Returns:
+            {BV号: 视频信息}，负缓存的值为 None，未命中或已过期的不包含在结果中
+        """
+        bvids = list(dict.fromkeys(bvids))
+        now = time.time()
+        result: Dict[str, Optional[Dict[str, Any]]] = {}
+        with self._lock:
+            for start in range(0, len(bvids), _BATCH_SIZE):
+                chunk = bvids[start:start + _BATCH_SIZE]
+                rows = self._conn.execute(
+                    "SELECT bvid, info, fetched_at FROM video_info WHERE bvid IN "
+                    f"({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for bvid, info, fetched_at in rows:
+                    if self._is_fresh(info, fetched_at, now):
+                        result[bvid] = json.loads(info) if info is not None else None
+        return result
+
+    def put(self, bvid: str, info: Dict[str, Any]) -> None:
+        """写入一条视频信息"""
+        self.put_many({bvid: info})
+
+    def put_many(self, infos: Dict[str, Dict[str, Any]]) -> None:
+        """批量写入视频信息（单个事务）"""
+        now = time.time()
+        rows = [
+            (bvid, json.dumps(self._slim(info), ensure_ascii=False), None, now)
+            for bvid, info in infos.items()
+        ]
+        self._write(rows)
+
+    def put_negative(self, bvid: str, error_code: int) -> None:
+        """记录已删除或无效的视频，在 negative_ttl_hours 内不再请求"""
+        self._write([(bvid, None, error_code, time.time())])
+
+    def invalidate(self, bvid: str) -> None:
+        """删除一条记录"""
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute("DELETE FROM video_info WHERE bvid = ?", (bvid,))
+            except sqlite3.Error as e:
+                logger.warning(f"删除元数据缓存失败 ({bvid}): {e}")
+
+    def _write(self, rows) -> None:
+        if not rows:
+            return
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO video_info (bvid, info, error_code, fetched_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"写入元数据缓存失败: {e}")
+
+
+_shared_cache: Optional[VideoInfoCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_video_info_cache() -> VideoInfoCache:
+    """获取进程内共享的元数据缓存实例"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = VideoInfoCache()
+        return _shared_cache
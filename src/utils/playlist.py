@@ -1,13 +1,197 @@
-"""播放列表转换工具"""
+"""播放列表生成与转换工具"""
 
+import hashlib
+import json
 import re
 import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# 播放列表排序方式：favorite = 与收藏夹顺序一致；append = 保留已有曲目的顺序，新曲目追加到末尾
+PLAYLIST_ORDERS = ("favorite", "append")
+
+
+def _file_digest(file_path: str) -> Optional[str]:
+    try:
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _atomic_write(file_path: str, content: str, encoding: str) -> bool:
+    """
+    先写临时文件再替换，写到一半中断时不会留下损坏的播放列表
+
+    Returns:
+        是否写入；内容哈希与现有文件相同时不写入，避免 TS Bot 重新加载
+    """
+    data = content.encode(encoding)
+    if hashlib.sha256(data).hexdigest() == _file_digest(file_path):
+        return False
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+def _single_line(text: str) -> str:
+    """标题中的换行会破坏按行解析的播放列表格式"""
+    return " ".join(str(text).splitlines()).strip()
+
+
+def render_m3u(tracks: List[Dict[str, Any]], list_title: str) -> str:
+    """
+    生成 M3U 播放列表内容
+
+    Args:
+        tracks: 曲目记录列表，每项包含 {'title': str, 'path': str, 'duration': int}
+        list_title: 播放列表标题（M3U 中不使用）
+    """
+    lines = ["#EXTM3U"]
+    for track in tracks:
+        lines.append(f"#EXTINF:{int(track.get('duration') or 0)},{_single_line(track['title'])}")
+        lines.append(track["path"])
+    return "\n".join(lines)
+
+
+def render_ts_bot(tracks: List[Dict[str, Any]], list_title: str, base_path: str = "") -> str:
+    """
+    生成 TS Bot（version:3）格式的播放列表内容，元数据与条目均使用 JSON 编码
+
+    Args:
+        tracks: 曲目记录列表
+        list_title: 播放列表标题
+        base_path: 基础路径前缀（可选）
+    """
+    lines = [
+        'version:3',
+        'meta:' + json.dumps({"count": len(tracks), "title": list_title}, ensure_ascii=False),
+        '',
+    ]
+    for track in tracks:
+        # 清理标题中的特殊字符
+        title = _single_line(track["title"]).replace("；", "-").replace("  ", " ").strip()
+        entry = {"type": "media", "resid": base_path + track["path"], "title": title}
+        lines.append('rsj:' + json.dumps(entry, ensure_ascii=False))
+    return "\n".join(lines) + "\n"
+
+
+# 支持的播放列表格式：名称 -> (生成函数, 文件编码)
+PLAYLIST_FORMATS: Dict[str, Tuple[Callable[..., str], str]] = {
+    "m3u": (render_m3u, 'utf-8'),
+    # TS Bot 读取带 BOM 的 UTF-8
+    "tsbot": (render_ts_bot, 'utf-8-sig'),
+}
+
+
+def register_playlist_format(
+    name: str,
+    renderer: Callable[[List[Dict[str, Any]], str], str],
+    encoding: str = 'utf-8',
+) -> None:
+    """注册新的播放列表格式，renderer(tracks, list_title) 返回文件内容"""
+    PLAYLIST_FORMATS[name] = (renderer, encoding)
+
+
+def write_playlists(
+    tracks: Iterable[Dict[str, Any]],
+    outputs: Dict[str, str],
+    list_title: Optional[str] = None,
+) -> List[str]:
+    """
+    从曲目记录一次生成多种格式的播放列表（每个文件原子写入，内容未变化的文件保持不动）
+
+    Args:
+        tracks: 曲目记录，每项包含 {'title': str, 'path': str, 'duration': int}
+        outputs: {格式名: 文件路径}，格式名见 PLAYLIST_FORMATS
+        list_title: 播放列表标题，None 则取第一个输出文件名（不含扩展名）
+
+    Returns:
+        实际写入的文件路径
+    """
+    tracks = list(tracks)
+    written = []
+    for name, file_path in outputs.items():
+        renderer, encoding = PLAYLIST_FORMATS[name]
+        title = list_title or os.path.splitext(os.path.basename(file_path))[0]
+        if _atomic_write(file_path, renderer(tracks, title), encoding):
+            written.append(file_path)
+    return written
+
+
+def merge_tracks(
+    tracks: List[Dict[str, Any]],
+    previous: List[Dict[str, Any]],
+    order: str = "favorite",
+) -> List[Dict[str, Any]]:
+    """
+    将本次同步的曲目与上次生成的播放列表合并
+
+    不在本次曲目中的旧曲目被移除；本次没有时长的曲目（缓存命中）沿用上次记录的时长，
+    避免内容无谓变化。
+
+    Args:
+        tracks: 本次同步的曲目记录（收藏夹顺序）
+        previous: 上次播放列表中的曲目记录（read_m3u 的结果）
+        order: 排序方式，见 PLAYLIST_ORDERS
+
+    Returns:
+        合并后的曲目记录
+    """
+    def key(track: Dict[str, Any]) -> str:
+        return os.path.normcase(track["path"])
+
+    previous_by_path = {key(track): track for track in previous}
+    merged = []
+    for track in tracks:
+        old = previous_by_path.get(key(track))
+        if old and not track.get("duration") and old.get("duration"):
+            track = {**track, "duration": old["duration"]}
+        merged.append(track)
+
+    if order == "append":
+        remaining = {key(track): track for track in merged}
+        kept = [remaining.pop(key(track)) for track in previous if key(track) in remaining]
+        merged = kept + list(remaining.values())
+    return merged
+
+
+def read_m3u(m3u_file_path: str) -> List[Dict[str, Any]]:
+    """
+    读取 M3U 播放列表中的曲目记录
+
+    Returns:
+        [{'title': str, 'path': str, 'duration': int}]
+    """
+    # 读取 M3U 文件（确保不带 BOM）
+    with open(m3u_file_path, 'r', encoding='utf-8-sig') as m3u_file:
+        lines = m3u_file.read().splitlines()
+
+    tracks = []
+    for i, line in enumerate(lines):
+        match = re.match(r"#EXTINF:(-?\d+),(.*)", line)
+        # 下一行是文件路径
+        if match and i + 1 < len(lines):
+            tracks.append({
+                "title": match.group(2).strip(),
+                "path": lines[i + 1].strip(),
+                "duration": max(0, int(match.group(1))),
+            })
+    return tracks
 
 
 def convert_m3u_to_txt(m3u_file_path: str, save_file_path: str, base_path: str = "") -> None:
     """
-    将 M3U 播放列表转换为 TS Bot 格式的播放列表
-    
+    将已有的 M3U 播放列表转换为 TS Bot 格式的播放列表
+    （下载流程直接用 write_playlists 生成两种格式，不再经过这一步）
+
     Args:
         m3u_file_path: M3U 文件路径
         save_file_path: 保存的播放列表文件路径
@@ -15,46 +199,8 @@ def convert_m3u_to_txt(m3u_file_path: str, save_file_path: str, base_path: str =
     """
     # 从文件路径提取播放列表标题
     list_title = os.path.splitext(os.path.basename(m3u_file_path))[0]
-    
-    # 读取 M3U 文件（确保不带 BOM）
-    with open(m3u_file_path, 'r', encoding='utf-8-sig') as m3u_file:
-        lines = m3u_file.readlines()
-    
-    # 解析 M3U 内容
-    music_list = []
-    for i in range(len(lines)):
-        # 过滤 #EXTINF 行
-        if lines[i].startswith("#EXTINF"):
-            # 获取歌曲时长和歌曲标题
-            match = re.match(r"#EXTINF:(\d+),(.*)", lines[i])
-            if match:
-                song_title = match.group(2).strip()
-                # 下一行是文件路径
-                if i + 1 < len(lines):
-                    song_path = lines[i + 1].strip()
-                    
-                    # 清理标题中的特殊字符
-                    song_title = song_title.replace("；", "-").replace("  ", " ").strip()
-                    
-                    # 生成对应的 JSON 格式内容
-                    music_list.append({
-                        "title": song_title,
-                        "path": song_path
-                    })
-    
-    # 写入 TS Bot 格式的播放列表
-    with open(save_file_path, 'w', encoding='utf-8-sig') as txt_file:
-        # 输出版本和元数据
-        txt_file.write('version:3\n')
-        txt_file.write('meta:{"count": %d, "title": "%s"}\n\n' % (len(music_list), list_title))
-        
-        # 输出每一首音乐的对应格式
-        for music in music_list:
-            song_title = music["title"].replace('"', '\\"')
-            song_path = music["path"].replace('"', '\\"')
-            # 拼接完整路径并生成 rsj 条目
-            full_path = base_path + song_path
-            txt_file.write(f'rsj:{{"type": "media", "resid": "{full_path}", "title": "{song_title}"}}\n')
+    content = render_ts_bot(read_m3u(m3u_file_path), list_title, base_path)
+    _atomic_write(save_file_path, content, 'utf-8-sig')
 
 
 def sanitize_filename(filename: str) -> str:
@@ -71,3 +217,33 @@ def sanitize_filename(filename: str) -> str:
     illegal_chars = r'[<>:"/\\|?*]'
     return re.sub(illegal_chars, '', filename).strip()
 
+
+
+def format_playlist_name(playlist_name: str) -> str:
+    """
+    格式化播放列表名称（移除特殊字符，转换中文为拼音）
+    
+    Args:
+        playlist_name: 原始播放列表名称
+        
+    Returns:
+        格式化后的名称
+    """
+    try:
+        from pypinyin import lazy_pinyin
+        # 使用 pypinyin 将中文转换为拼音
+        pinyin_list = lazy_pinyin(playlist_name)
+        result = '_'.join(pinyin_list)
+        result = result.replace("♿", "chongci")
+    except ImportError:
+        # 如果没有安装 pypinyin，直接使用原名称
+        result = playlist_name
+    
+    # 移除或替换其他特殊字符，只保留字母、数字和下划线
+    result = re.sub(r'[^\w\-_]', '_', result)
+    # 移除多余的下划线
+    result = re.sub(r'_+', '_', result)
+    # 移除开头和结尾的下划线
+    result = result.strip('_')
+    
+    return result if result else 'playlist'
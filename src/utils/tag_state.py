@@ -0,0 +1,82 @@
+"""标签状态记录：按文件记录上次检查时的大小、修改时间与已有的标签，文件未变化时不再用 mutagen 打开"""
+
+import os
+import sqlite3
+import threading
+from typing import FrozenSet, Iterable, Optional, Tuple
+
+from .cache import _PROJECT_ROOT, CACHE_FILENAME, _connect
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TagStateStore:
+    """标签状态存储（与下载缓存共用 download_cache.db，线程安全）"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初始化标签状态存储
+
+        Args:
+            db_path: 数据库路径，None 则使用项目根目录下的 download_cache.db
+        """
+        self.db_path = db_path or os.path.join(_PROJECT_ROOT, CACHE_FILENAME)
+        self._lock = threading.Lock()
+        self._conn = _connect(self.db_path)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tag_state ("
+                " file_path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime REAL NOT NULL,"
+                " tags TEXT NOT NULL)"  # 已有标签的键，逗号分隔
+            )
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return os.path.normcase(os.path.abspath(file_path))
+
+    def present_tags(self, file_path: str, stat: Tuple[int, float]) -> Optional[FrozenSet[str]]:
+        """
+        返回文件已有的标签键；没有记录或文件自记录后发生过变化（大小或修改时间不同）时返回 None
+
+        Args:
+            file_path: 音频文件路径
+            stat: 文件当前的 (大小, 修改时间)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime, tags FROM tag_state WHERE file_path = ?",
+                (self._key(file_path),),
+            ).fetchone()
+        if not row or (row[0], row[1]) != tuple(stat):
+            return None
+        return frozenset(tag for tag in row[2].split(",") if tag)
+
+    def record(self, file_path: str, stat: Tuple[int, float], tags: Iterable[str]) -> None:
+        """记录文件检查（或写入标签）后的状态"""
+        size, mtime = stat
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO tag_state (file_path, size, mtime, tags) "
+                        "VALUES (?, ?, ?, ?)",
+                        (self._key(file_path), size, mtime, ",".join(sorted(tags))),
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"写入标签状态失败 ({file_path}): {e}")
+
+
+_shared_store: Optional[TagStateStore] = None
+_shared_store_lock = threading.Lock()
+
+
+def get_tag_state_store() -> TagStateStore:
+    """获取进程内共享的标签状态存储"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = TagStateStore()
+        return _shared_store